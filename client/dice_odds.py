@@ -0,0 +1,78 @@
+# Dice odds for bot authors
+# Every table is built once at import, so looking up how likely a bid is costs an index instead of a scipy call
+# A die counts towards a bid's face if it shows that face, or a one while ones are wild and the face isn't one
+
+import numpy as np
+
+# Most dice the tables cover to start with, dice_count times the max player_count in the default server config
+MAX_DICE = 30
+
+def match_chance(wild):
+    # Chance one unseen die counts towards a face
+    return 2/6 if wild else 1/6
+
+def tail_table(max_dice, p):
+    # [unseen dice, needed] chance at least needed of the unseen dice match, needed runs one past max_dice so anything over is 0
+    pmf = np.zeros([max_dice+1, max_dice+2])
+    pmf[0, 0] = 1.0
+    for unseen in range(1, max_dice+1):
+        pmf[unseen] = pmf[unseen-1]*(1-p)
+        pmf[unseen, 1:] += pmf[unseen-1, :-1]*p
+    return np.cumsum(pmf[:, ::-1], axis=1)[:, ::-1]
+
+def build_tails(max_dice):
+    # [wild, unseen dice, needed], wild is 0 for faces that only count themselves and 1 for faces that ones also count towards
+    return np.stack([tail_table(max_dice, match_chance(False)), tail_table(max_dice, match_chance(True))])
+
+TAILS = build_tails(MAX_DICE)
+
+def cover(dice_count):
+    # Servers with more dice than the tables cover get them rebuilt bigger, once
+    global MAX_DICE, TAILS
+    if dice_count > MAX_DICE:
+        MAX_DICE = dice_count
+        TAILS = build_tails(MAX_DICE)
+
+def tail_probability(unseen_count, needed, wild):
+    # Chance at least needed of unseen_count dice match a face
+    if needed <= 0:
+        return 1.0
+    if needed > unseen_count:
+        return 0.0
+    cover(unseen_count)
+    return float(TAILS[int(wild), unseen_count, needed])
+
+def face_wilds(game_state):
+    # Which faces ones count towards right now, by face index
+    wilds = np.full(6, game_state['wild_ones'])
+    wilds[0] = False
+    return wilds
+
+def own_matches(game_state):
+    # How many of our dice count towards each face, by face index
+    dice = np.asarray(game_state['dice'])
+    return dice + face_wilds(game_state)*dice[0]
+
+def unseen_count(game_state):
+    return sum(game_state['dice_counts']) - sum(game_state['dice'])
+
+def bid_probability(game_state, bid):
+    # Chance bid [count, face] is good given our own dice, assuming everyone else's dice are random
+    face_idx = bid[1]-1
+    wild = bool(face_wilds(game_state)[face_idx])
+    return tail_probability(unseen_count(game_state), bid[0] - int(own_matches(game_state)[face_idx]), wild)
+
+def bid_ladder(game_state):
+    # [count, face index] chance every bid is good, count runs from 0 to every die in the game
+    unseen = unseen_count(game_state)
+    cover(unseen)
+    counts = np.arange(sum(game_state['dice_counts'])+1)
+    needed = np.clip(counts[:, None] - own_matches(game_state)[None, :], 0, MAX_DICE+1)
+    return TAILS[face_wilds(game_state).astype(np.int64)[None, :], unseen, needed]
+
+def legal_bids(game_state):
+    # [count, face index] True for every bid that raises the current one
+    counts = np.arange(sum(game_state['dice_counts'])+1)[:, None]
+    faces = np.arange(1, 7)[None, :]
+    bid_count, bid_face = game_state['bid']
+    return (counts > bid_count) | ((counts == bid_count) & (faces > bid_face))
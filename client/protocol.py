@@ -0,0 +1,182 @@
+# Wire protocol helpers shared by the server and the client
+# Bots opt in to protocol features with flags in their registry data, bots that don't keep getting full json game states
+
+from collections import OrderedDict
+import json
+import struct
+
+# msgpack is optional, without it the history part of binary game states is sent as json
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Max number of games a client keeps cached game states for
+MAX_CACHED_GAMES = 4096
+
+# Binary game states start with a fixed header of the fields every bot reads every move
+# format, flags, bid count, bid face, bot index, player count, round count, dice
+# then one byte per player of dice counts, then everything else encoded as json or msgpack
+GAME_STATE_HEADER = struct.Struct('<BBHBBBH6B')
+GAME_STATE_HOT_FIELDS = ['bid', 'dice', 'dice_counts', 'bot_index', 'player_count', 'round_count', 'wild_ones', 'first_round']
+FORMAT_JSON = 1
+FORMAT_MSGPACK = 2
+FLAG_WILD_ONES = 1
+FLAG_FIRST_ROUND = 2
+
+# Binary moves are response type (0 call, 1 bid), bid count, bid face
+MOVE_FORMAT = struct.Struct('<BHB')
+MOVE_CALL = 0
+MOVE_BID = 1
+
+def default_encoding():
+    # Encoding a client should ask for based on what it has installed
+    return 'msgpack' if msgpack is not None else 'binary'
+
+def negotiated_options(registry_data):
+    # Protocol features a bot asked for when it registered
+    encoding = registry_data.get('encoding', 'json')
+    if encoding == 'msgpack' and msgpack is None:
+        encoding = 'binary' # We can still do the fixed header, just not msgpack for the rest
+    elif encoding not in ['json', 'binary', 'msgpack']:
+        encoding = 'json'
+    # How many moves the bot can work on at once, None means send everything as soon as it's ready
+    max_concurrent_moves = registry_data.get('max_concurrent_moves')
+    if not isinstance(max_concurrent_moves, int) or isinstance(max_concurrent_moves, bool) or max_concurrent_moves < 1:
+        max_concurrent_moves = None
+    return {
+        'delta_state': bool(registry_data.get('delta_state', False)),
+        'encoding': encoding,
+        'max_concurrent_moves': max_concurrent_moves,
+        'game_over': bool(registry_data.get('game_over', False)), # Send a GameOver frame when each of the bot's games ends
+    }
+
+def game_over_summary(game_uuid, bot_index, bot_count, bot_rankings):
+    # What a bot is told when a game it played ends, bot_rankings is None if the game hit the game timeout
+    return {
+        'game_uuid': game_uuid,
+        'bot_index': bot_index,
+        'bot_count': bot_count,
+        'bot_rankings': bot_rankings,
+        'placement': bot_rankings.index(bot_index) + 1 if bot_rankings is not None else None,
+        'timed_out': bot_rankings is None,
+    }
+
+def encode_game_state(game_state, encoding):
+    if encoding == 'json':
+        return json.dumps(game_state).encode('utf-8')
+
+    cold_fields = {key: val for key, val in game_state.items() if key not in GAME_STATE_HOT_FIELDS}
+    if encoding == 'msgpack':
+        cold_format, cold_data = FORMAT_MSGPACK, msgpack.packb(cold_fields)
+    else:
+        cold_format, cold_data = FORMAT_JSON, json.dumps(cold_fields).encode('utf-8')
+
+    flags = FLAG_WILD_ONES*game_state['wild_ones'] | FLAG_FIRST_ROUND*game_state['first_round']
+    try:
+        header = GAME_STATE_HEADER.pack(
+            cold_format,
+            flags,
+            game_state['bid'][0],
+            game_state['bid'][1],
+            game_state['bot_index'],
+            game_state['player_count'],
+            game_state['round_count'],
+            *game_state['dice'],
+        )
+    except struct.error:
+        # Some bot got a bid accepted that doesn't fit the fixed layout, fall back to json
+        return json.dumps(game_state).encode('utf-8')
+    return header + bytes(game_state['dice_counts']) + cold_data
+
+def decode_game_state(message):
+    # Json game states always start with {, binary ones start with their format byte
+    if message[:1] == b'{':
+        return json.loads(message)
+
+    cold_format, flags, bid_count, bid_face, bot_index, player_count, round_count, *dice = GAME_STATE_HEADER.unpack_from(message)
+    cold_start = GAME_STATE_HEADER.size + player_count
+    if cold_format == FORMAT_MSGPACK:
+        game_state = msgpack.unpackb(message[cold_start:])
+    else:
+        game_state = json.loads(message[cold_start:])
+
+    game_state['bid'] = [bid_count, bid_face]
+    game_state['dice'] = dice
+    game_state['dice_counts'] = list(message[GAME_STATE_HEADER.size:cold_start])
+    game_state['bot_index'] = bot_index
+    game_state['player_count'] = player_count
+    game_state['round_count'] = round_count
+    game_state['wild_ones'] = bool(flags & FLAG_WILD_ONES)
+    game_state['first_round'] = bool(flags & FLAG_FIRST_ROUND)
+    return game_state
+
+def encode_move(response, encoding):
+    # Anything that doesn't fit the fixed layout is sent as json so the server can still judge it
+    if encoding != 'json' and isinstance(response, dict):
+        if response.get('response_type') == 'call':
+            return MOVE_FORMAT.pack(MOVE_CALL, 0, 0)
+        bid = response.get('bid')
+        if response.get('response_type') == 'bid' and isinstance(bid, (list, tuple)) and len(bid) == 2 \
+                and all(type(foo) is int for foo in bid) and 0 <= bid[0] <= 0xFFFF and 0 <= bid[1] <= 0xFF:
+            return MOVE_FORMAT.pack(MOVE_BID, bid[0], bid[1])
+    return json.dumps(response).encode('utf-8')
+
+def decode_move(message):
+    # Returns the response dict for binary moves, json moves are passed through for the engine to parse
+    if len(message) == MOVE_FORMAT.size and message[0] in [MOVE_CALL, MOVE_BID]:
+        response_type, bid_count, bid_face = MOVE_FORMAT.unpack(message)
+        if response_type == MOVE_CALL:
+            return {'response_type': 'call'}
+        return {'response_type': 'bid', 'bid': [bid_count, bid_face]}
+    return message
+
+def make_delta_state(game_state, last_sent):
+    # Build a game state that only carries the rounds and bids the bot has not been sent yet
+    # last_sent is [round_count, bid_count] as of the last request sent to this bot in this game
+    rounds_sent, bids_sent = last_sent
+    if rounds_sent != game_state['round_count']:
+        bids_sent = 0 # New round, every bid in it is new
+
+    delta_state = {key: val for key, val in game_state.items() if key not in ['bid_history', 'round_history']}
+    delta_state['delta_base'] = [rounds_sent, bids_sent]
+    delta_state['new_rounds'] = game_state['round_history'][rounds_sent:]
+    delta_state['new_bids'] = game_state['bid_history'][bids_sent:]
+    return delta_state
+
+def apply_delta_state(game_cache, delta_state):
+    # Rebuild the full game state from a delta and the cached state of the same game
+    # game_cache is an OrderedDict of game states by game uuid, oldest games get dropped first
+    game_uuid = delta_state['game_uuid']
+    game_state = game_cache.pop(game_uuid, None)
+    if game_state is None:
+        game_state = {'bid_history': [], 'round_history': []}
+
+    rounds_sent, bids_sent = delta_state.pop('delta_base')
+    new_rounds = delta_state.pop('new_rounds')
+    if len(game_state['round_history']) < rounds_sent or (len(new_rounds) == 0 and len(game_state['bid_history']) < bids_sent):
+        print(f"WARNING: Cached game state for {game_uuid} is out of sync, history will be incomplete")
+
+    # After a timed out move the server goes back to a base the cache may be past, the delta resends everything after it
+    del game_state['round_history'][rounds_sent:]
+    if len(new_rounds) == 0:
+        del game_state['bid_history'][bids_sent:]
+
+    # Finished rounds mean the current bid history starts over
+    if len(new_rounds) > 0:
+        game_state['round_history'].extend(new_rounds)
+        game_state['bid_history'] = []
+    game_state['bid_history'].extend(delta_state.pop('new_bids'))
+    game_state.update(delta_state)
+
+    game_cache[game_uuid] = game_state
+    while len(game_cache) > MAX_CACHED_GAMES:
+        game_cache.popitem(last=False)
+    return game_state
+
+def new_game_cache():
+    return OrderedDict()
+
+def forget_game(game_cache, game_uuid):
+    # Finished games don't need their cached state, clients that get GameOver frames never wait for the cache to fill up
+    game_cache.pop(game_uuid, None)
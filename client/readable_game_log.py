@@ -4,6 +4,7 @@ import numpy as np
 import pandas as pd
 import zmq
 from copy import deepcopy
+from pathlib import Path
 
 parser = argparse.ArgumentParser()
 parser.add_argument("-a", "--broadcast_address", help="Address connect to to export game logs")
@@ -122,8 +123,16 @@ if args.export_path:
 else:
     export_file = None
 
+def load_game_logs(file_path, tourney_log):
+    # Game logs sit next to the tourney logs in json/games/<tourney_uuid>/, older tourney logs had them inline
+    if 'game_logs' in tourney_log:
+        return tourney_log['game_logs']
+    games_path = Path(file_path).parent.parent / 'games' / tourney_log['tourney_uuid']
+    return [json.load(open(games_path / f"{game_uuid}.json", 'r')) for game_uuid in tourney_log['game_uuids']]
+
 if args.file_path:
     tourney_log = json.load(open(args.file_path, 'r'))
+    tourney_log['game_logs'] = load_game_logs(args.file_path, tourney_log)
     makeReadableGameLog(tourney_log, args.player, args.bot, export_file)
 
 if args.broadcast_address:
@@ -137,6 +146,9 @@ if args.broadcast_address:
     poller = zmq.Poller()
     poller.register(log_socket, zmq.POLLIN)
 
+    # Game logs come in as games finish, hold onto them until their tourney log shows up
+    game_logs = {}
+
     while True:
         socks = dict(poller.poll(1000)) # 100ms timeout so we will start tournament even if every bot is connected
 
@@ -156,12 +168,12 @@ if args.broadcast_address:
                 json.dump(msg_data, open(log_path / "json" / "clients" / f"{msg_data['session_uuid']}.json", 'w'), indent='\t')
             elif messageType == b'TourneyLog':
                 tourney_log = json.loads(messageData[0].decode('utf-8'))
+                tourney_games = game_logs.pop(tourney_log['tourney_uuid'], {})
+                tourney_log['game_logs'] = [tourney_games[foo] for foo in tourney_log['game_uuids'] if foo in tourney_games]
                 makeReadableGameLog(tourney_log, args.player, args.bot, export_file)
             elif messageType == b'GameLog':
-                # We are only logging tourney logs now
-                pass
-                # msg_data = json.loads(messageData[0])
-                # json.dump(msg_data, open(log_path / "json" / "games" / f"{msg_data['tourney_uuid']}_{msg_data['game_uuid']}.json", 'w'), indent='\t')
+                msg_data = json.loads(messageData[0])
+                game_logs.setdefault(msg_data['tourney_uuid'], {})[msg_data['game_uuid']] = msg_data
             else:
                 print(f"Invalid Message Type Received: {messageType}")
                 continue
\ No newline at end of file
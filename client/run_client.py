@@ -5,16 +5,26 @@ import time
 import json
 import random
 from multiprocessing import Process
+from collections import deque, OrderedDict
 import os
+import math
+import bisect
+import hashlib
+import inspect
+import traceback
 import importlib.util
 from pathlib import Path
-import socket
+
+import protocol
 
 parser = argparse.ArgumentParser()
 parser.add_argument("zmq_address", help="Address to start ZMQ on")
 parser.add_argument("bot_path", help="Python file containing bot info")
-parser.add_argument("-t", "--threads", default=25, help="How many threads to spin up to handle game engine requests (default is 25)")
+parser.add_argument("-t", "--threads", default=os.cpu_count(), type=int, help="Most processes to handle game engine requests with, the pool grows and shrinks with load (default is one per core)")
+parser.add_argument("--min_threads", default=1, type=int, help="Fewest processes to keep running (default is 1)")
 parser.add_argument("-p", "--ping_freq_mS", default=10000, help="How frequently to ping server (default is 10 seconds)")
+parser.add_argument("--full_state", action='store_true', help="Have the server send the full game state every move instead of just what changed")
+parser.add_argument("--json", action='store_true', help="Use json for every message instead of the compact binary encoding")
 args = parser.parse_args()
 
 # Import library specified as argument
@@ -26,46 +36,101 @@ spec.loader.exec_module(bot_module)
 
 CalculateMove = bot_module.calculateMove
 BOT_REGISTRY_DATA = bot_module.BOT_REGISTRY_DATA
+# Bots that keep state between moves get every move of a game on the same handler
+STICKY_GAMES = not BOT_REGISTRY_DATA.get("stateless", True)
+# Sticky bots that define calculateMove(game_state, game_context) get a dict that lasts for the whole game on its handler
+TAKES_CONTEXT = STICKY_GAMES and 'game_context' in inspect.signature(CalculateMove).parameters
+# Optional onGameEnd(game_uuid, summary), called on the game's handler for sticky games and in the main process otherwise
+OnGameEnd = getattr(bot_module, 'onGameEnd', None)
+
+def call_game_end(game_uuid, summary):
+    if OnGameEnd is None:
+        return
+    try:
+        OnGameEnd(game_uuid.decode(), json.loads(summary))
+    except Exception:
+        traceback.print_exc()
+
+# How often the pool size is checked
+POOL_ADJUST_PERIOD_S = 0.5
+# Extra handlers over what the measured load needs, so short bursts don't queue
+POOL_HEADROOM = 1.5
+# Moves the server is told we can take per handler the pool can grow to, a little extra keeps handlers busy and shows us when we need more
+MOVES_PER_HANDLER = 2
+# Points each handler gets on the hash ring, more spreads games more evenly
+HANDLER_RING_REPLICAS = 64
+# Game contexts each handler keeps, least recently used ones go first
+GAME_CONTEXT_LIMIT = 1024
 
-def MoveHandlerProcess(moveResponse_socket_path, gameState_socket_path):
+def ring_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+def MoveHandlerProcess(handler_socket_path, handler_id):
     context = zmq.Context()
 
-    # Socket to get game states
-    receiver = context.socket(zmq.PULL)
-    receiver.connect(gameState_socket_path)
+    # Socket to get game states and send responses, the main loop routes to us by id
+    handler_socket = context.socket(zmq.DEALER)
+    handler_socket.setsockopt(zmq.IDENTITY, handler_id)
+    handler_socket.connect(handler_socket_path)
+    handler_socket.send_multipart([b'Ready'])
 
-    # Socket to send responses
-    sender = context.socket(zmq.PUB)
-    sender.connect(moveResponse_socket_path)
+    # Per game dicts the bot can keep whatever it wants in, the oldest are dropped past GAME_CONTEXT_LIMIT so bots should expect to start over
+    game_contexts = OrderedDict()
+    # Full game states by game uuid, deltas are rebuilt here so the main process only ever forwards bytes
+    game_cache = protocol.new_game_cache()
 
     while True:
         try:
+            messageType, *messageData = handler_socket.recv_multipart()
+            if messageType == b'Stop':
+                break
+            # Game is done, nothing to send back so the handler stays however busy it was
+            if messageType == b'GameOver':
+                game_uuid, summary = messageData
+                game_contexts.pop(game_uuid, None)
+                protocol.forget_game(game_cache, game_uuid.decode())
+                if STICKY_GAMES:
+                    call_game_end(game_uuid, summary)
+                continue
             # Receive game state and get response
-            game_uuid, game_state = receiver.recv_multipart()
-            respose = CalculateMove(json.loads(game_state))
-            sender.send_multipart([game_uuid, json.dumps(respose).encode('utf-8')])
+            game_uuid, game_state = messageData
+            start_time = time.time()
+            try:
+                game_state = protocol.decode_game_state(game_state)
+                # Bots never see deltas
+                if 'delta_base' in game_state:
+                    game_state = protocol.apply_delta_state(game_cache, game_state)
+                if TAKES_CONTEXT:
+                    game_context = game_contexts.pop(game_uuid, None)
+                    if game_context is None:
+                        game_context = {}
+                    game_contexts[game_uuid] = game_context
+                    if len(game_contexts) > GAME_CONTEXT_LIMIT:
+                        game_contexts.popitem(last=False)
+                    move = CalculateMove(game_state, game_context=game_context)
+                else:
+                    move = CalculateMove(game_state)
+                move = protocol.encode_move(move, BOT_REGISTRY_DATA["encoding"])
+            except Exception:
+                # No answer means a timeout for this move, but the handler stays up
+                traceback.print_exc()
+                move = b''
+            handler_socket.send_multipart([b'Move', game_uuid, move, str(time.time() - start_time).encode('utf-8')])
         except zmq.ZMQError as e:
             print(f"MoveHandlerThread error: {e}")
             break
-
-def find_open_port(start_port=8000, max_port=65535):
-    for port in range(start_port, max_port + 1):
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                # Try to bind to the port
-                sock.bind(('localhost', port))
-                return port
-        except OSError:
-            # Port is already in use, continue to next port
-            continue
-    
-    return None  # No available port found
+    handler_socket.close()
 
 # Generate metadata
 SESSION_GUID = str(uuid.uuid4())
 print(f"SESSION_GUID:{SESSION_GUID}")
 BOT_REGISTRY_DATA["session_uuid"] = SESSION_GUID
 BOT_REGISTRY_DATA["full_title"] = "_".join([BOT_REGISTRY_DATA['name'], BOT_REGISTRY_DATA['version'], BOT_REGISTRY_DATA['player']])
+BOT_REGISTRY_DATA["delta_state"] = not args.full_state
+BOT_REGISTRY_DATA["encoding"] = 'json' if args.json else protocol.default_encoding()
+BOT_REGISTRY_DATA["game_over"] = True # Free cached game states and contexts as soon as games end
+# Delta game states can only be rebuilt on the handler that has the rest of the game, so those games stay on one handler too
+PINNED_GAMES = STICKY_GAMES or BOT_REGISTRY_DATA["delta_state"]
 
 # Set up ZMQ connection
 context = zmq.Context.instance()
@@ -76,55 +141,152 @@ server_socket.setsockopt_string(zmq.IDENTITY, SESSION_GUID) # Set ID
 server_url = f"tcp://{args.zmq_address}:5555"
 server_socket.connect(server_url)
 
-move_port = find_open_port()
-socket_port = find_open_port(move_port+1)
-moveResponse_socket_path = f"tcp://localhost:{move_port}"
-gameState_socket_path = f"tcp://localhost:{socket_port}" # Include GUID in socket path so we can handle multiple sessions
-print(f"Opened ports for move responses on {move_port} and game states on {socket_port}")
+# Backend socket for handler communication, zmq picks a free port so clients on the same machine never collide
+handler_socket = context.socket(zmq.ROUTER)
+handler_port = handler_socket.bind_to_random_port("tcp://127.0.0.1")
+handler_socket_path = f"tcp://127.0.0.1:{handler_port}"
+print(f"Opened port for move handlers on {handler_port}")
+
+# Handler pool, grows when moves queue up or the measured load needs more and shrinks when handlers sit idle
+min_handlers = max(1, min(args.min_threads, args.threads))
+max_handlers = max(min_handlers, args.threads)
+handlers = {} # Handler processes by id
+starting_handlers = set() # Ids of handlers that haven't said they're ready yet
+idle_handlers = deque() # Ids of handlers waiting for a game state
+waiting_moves = deque() # [game_uuid, game_state] waiting for any handler
+pinned_moves = {} # [game_uuid, game_state] waiting for a specific handler by handler id, only used for pinned games
+game_handlers = OrderedDict() # Handler id each pinned game is on by game uuid, oldest games get dropped first
+handler_ring = [] # Sorted [hash, handler id] points, a game goes to the first point at or after its hash
+next_handler_idx = 0
+def start_handler():
+    global next_handler_idx
+    handler_id = f"{next_handler_idx}".encode('utf-8')
+    next_handler_idx += 1
+    p = Process(
+        target=MoveHandlerProcess,
+        args=[handler_socket_path, handler_id],
+        name=f"MoveHandlerProcess_{SESSION_GUID}_{handler_id.decode()}",
+        daemon=True
+    )
+    p.start()
+    handlers[handler_id] = p
+    starting_handlers.add(handler_id)
+    pinned_moves[handler_id] = deque()
+    for replica in range(HANDLER_RING_REPLICAS):
+        bisect.insort(handler_ring, [ring_hash(handler_id + b':' + str(replica).encode('utf-8')), handler_id])
+
+def stop_handler(handler_id):
+    handler_socket.send_multipart([handler_id, b'Stop'])
+    handlers.pop(handler_id).join(timeout=1)
+    starting_handlers.discard(handler_id)
+    pinned_moves.pop(handler_id)
+    handler_ring[:] = [foo for foo in handler_ring if foo[1] != handler_id]
+
+def game_handler(game_uuid):
+    # Consistent hashing spreads new games over the pool
+    idx = bisect.bisect_left(handler_ring, [ring_hash(game_uuid), b''])
+    return handler_ring[idx % len(handler_ring)][1]
 
-# Backend socket for thread communication
-moveResponse_socket = context.socket(zmq.SUB)
-moveResponse_socket.bind(moveResponse_socket_path)
-moveResponse_socket.setsockopt(zmq.SUBSCRIBE, b"")
+def game_owner(game_uuid):
+    # Pinned games stay on the handler they started on until they end, resizing the pool only changes where new games go
+    handler_id = game_handlers.pop(game_uuid, None)
+    if handler_id not in handlers:
+        handler_id = game_handler(game_uuid)
+    game_handlers[game_uuid] = handler_id
+    if len(game_handlers) > protocol.MAX_CACHED_GAMES:
+        game_handlers.popitem(last=False)
+    return handler_id
 
-# Backend socket to send 
-gameState_socket = context.socket(zmq.PUSH)
-gameState_socket.bind(gameState_socket_path)
+# Load seen since the last pool check
+moves_received = 0
+move_compute_S = 0.0
+moves_computed = 0
+last_adjust_time = time.time()
+def adjust_pool():
+    global moves_received, move_compute_S, moves_computed, last_adjust_time
+    # Handlers needed is move rate times time per move, plus one for anything already waiting
+    elapsed_S = time.time() - last_adjust_time
+    compute_S = move_compute_S / moves_computed if moves_computed > 0 else 0.0
+    waiting_count = len(waiting_moves) + sum(len(foo) for foo in pinned_moves.values())
+    target = math.ceil(POOL_HEADROOM * compute_S * moves_received / elapsed_S) + waiting_count
+    target = min(max_handlers, max(min_handlers, target))
+    moves_received, move_compute_S, moves_computed, last_adjust_time = 0, 0.0, 0, time.time()
+
+    # Grow straight to the target, shrink by half the difference at a time and only with idle handlers that have no pinned games left
+    if target > len(handlers):
+        for _ in range(target - len(handlers)):
+            start_handler()
+    elif target < len(handlers):
+        busy_handlers = set(game_handlers.values())
+        free_handlers = [foo for foo in idle_handlers if foo not in busy_handlers]
+        for handler_id in free_handlers[:math.ceil((len(handlers) - target) / 2)]:
+            idle_handlers.remove(handler_id)
+            stop_handler(handler_id)
+
+def grow_for_waiting_moves():
+    # Don't leave moves waiting on the next pool check, their clock is already running
+    # Only one new handler per waiting move, counting the ones still starting up
+    waiting_count = len(waiting_moves) + sum(len(foo) for foo in pinned_moves.values())
+    if waiting_count > len(starting_handlers) and len(handlers) < max_handlers:
+        start_handler()
+
+def send_to_handler(game_uuid, game_state):
+    if PINNED_GAMES:
+        handler_id = game_owner(game_uuid)
+        if handler_id in idle_handlers:
+            idle_handlers.remove(handler_id)
+            handler_socket.send_multipart([handler_id, b'GameState', game_uuid, game_state])
+        else:
+            pinned_moves[handler_id].append([game_uuid, game_state])
+    elif idle_handlers:
+        handler_socket.send_multipart([idle_handlers.popleft(), b'GameState', game_uuid, game_state])
+    else:
+        waiting_moves.append([game_uuid, game_state])
+    grow_for_waiting_moves()
 
 # Send metadata on boot
 def register_bot():
     server_socket.send_multipart([b'', b'RegisterBot', json.dumps(BOT_REGISTRY_DATA).encode('utf-8')])
+for _ in range(min_handlers):
+    start_handler()
+# Tell the server what the full pool can take from the start, the pool grows as soon as moves wait so a small pool never holds the bot back
+BOT_REGISTRY_DATA["max_concurrent_moves"] = MOVES_PER_HANDLER*max_handlers
 register_bot()
+last_server_time = time.time()
 
 # Poller to have main loop receive both game states and finished move calculation
 poller = zmq.Poller()
 poller.register(server_socket, zmq.POLLIN)
-poller.register(moveResponse_socket, zmq.POLLIN)
-
-# Kick off processes to convert game states into moves
-for i in range(args.threads):
-    p = Process(
-        target=MoveHandlerProcess,
-        args=[moveResponse_socket_path, gameState_socket_path],
-        name=f"MoveHandlerProcess_{SESSION_GUID}_{i}",
-        daemon=True
-    )
-    p.start()
+poller.register(handler_socket, zmq.POLLIN)
 
 # Main loop
 print("Handlers started, running main loop")
 while True:
     try:
-        # Poll for messages with 10 second timeout
-        # This timeout is required to make sure the server gets pinged every 10 seconds
-        socks = dict(poller.poll(int(args.ping_freq_mS)))
+        # Wake up at least every pool check, the server still only gets pinged every ping_freq_mS
+        socks = dict(poller.poll(int(1000*POOL_ADJUST_PERIOD_S)))
 
         # Handle incoming client requests
         if server_socket in socks and socks[server_socket] == zmq.POLLIN:
+            last_server_time = time.time()
             fulMsg = server_socket.recv_multipart()
             _, messageType, *messageData = fulMsg
             if messageType == b'GameState':
-                gameState_socket.send_multipart(messageData)
+                # Game states go to the handlers as they came in, handlers decode them and rebuild deltas
+                moves_received += 1
+                send_to_handler(*messageData)
+            elif messageType == b'GameOver':
+                game_uuid, summary = messageData
+                # The game's handler frees its cached state and context, and runs onGameEnd for sticky games
+                if PINNED_GAMES:
+                    handler_id = game_handlers.pop(game_uuid, None)
+                    if handler_id not in handlers:
+                        handler_id = game_handler(game_uuid)
+                    # A move that timed out can end the game while its game state still waits for the handler, no one needs it now
+                    pinned_moves[handler_id] = deque(foo for foo in pinned_moves[handler_id] if foo[0] != game_uuid)
+                    handler_socket.send_multipart([handler_id, b'GameOver', game_uuid, summary])
+                if not STICKY_GAMES:
+                    call_game_end(game_uuid, summary)
             elif messageType == b'Print':
                 print(f"Received: {messageData[0].decode('utf-8')}")
             elif messageType == b'Ping':
@@ -133,22 +295,40 @@ while True:
             else:
                 print(f"WARNING: Unhandled message type {messageType}")
 
-        # Handle responses from backend socket
-        elif moveResponse_socket in socks and socks[moveResponse_socket] == zmq.POLLIN:
-            game_uuid, message = moveResponse_socket.recv_multipart()
-            server_socket.send_multipart([b'', b'Move', game_uuid, message])
+        # Handle responses from handlers, every message means that handler is free for the next game state
+        elif handler_socket in socks and socks[handler_socket] == zmq.POLLIN:
+            handler_id, messageType, *messageData = handler_socket.recv_multipart()
+            starting_handlers.discard(handler_id)
+            if messageType == b'Move':
+                game_uuid, message, compute_S = messageData
+                move_compute_S += float(compute_S)
+                moves_computed += 1
+                if message != b'':
+                    server_socket.send_multipart([b'', b'Move', game_uuid, message])
+            if handler_id in handlers:
+                if pinned_moves[handler_id]:
+                    handler_socket.send_multipart([handler_id, b'GameState', *pinned_moves[handler_id].popleft()])
+                elif waiting_moves:
+                    handler_socket.send_multipart([handler_id, b'GameState', *waiting_moves.popleft()])
+                else:
+                    idle_handlers.append(handler_id)
 
-        # Ping server if timed out
-        elif len(socks) == 0:
-            register_bot()
-        
         # Something is afoot
-        else:
+        elif len(socks) != 0:
             print(f"Failed to handle {socks}")
+
+        if time.time() - last_adjust_time > POOL_ADJUST_PERIOD_S:
+            adjust_pool()
+
+        # Ping server if it has been quiet
+        if (time.time() - last_server_time)*1000 > int(args.ping_freq_mS):
+            last_server_time = time.time()
+            register_bot()
     except KeyboardInterrupt:        
         break
 
 print("Shutting down...")
+for handler_id in list(handlers):
+    stop_handler(handler_id)
 server_socket.close()
-moveResponse_socket.close()
-gameState_socket.close()
+handler_socket.close()
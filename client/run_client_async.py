@@ -0,0 +1,153 @@
+# Single process client built on asyncio
+# Bots can define calculateMove as a plain function or as async def calculateMove
+# Async bots run on the event loop, so lightweight bots can play hundreds of games at once with no extra processes or ports
+# Plain bots run in a process pool sized with --workers, or inline on the event loop with --workers 0
+
+import uuid
+import argparse
+import asyncio
+import zmq
+import zmq.asyncio
+import json
+import os
+import copy
+import inspect
+import traceback
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+import protocol
+
+def load_bot(bot_path):
+    # Import library specified as argument
+    # We do it this way so players can just copy example bot without duplicating code
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(bot_path))[0], bot_path)
+    bot_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bot_module)
+    return bot_module
+
+# Pool workers load the bot themselves so nothing has to be pickled but game states and moves
+worker_bot = None
+def init_worker(bot_path):
+    global worker_bot
+    worker_bot = load_bot(bot_path)
+
+def worker_move(game_state):
+    return worker_bot.calculateMove(game_state)
+
+async def handle_move(server_socket, calculate_move, executor, game_uuid, game_state, encoding):
+    try:
+        if inspect.iscoroutinefunction(calculate_move):
+            response = await calculate_move(game_state)
+        elif executor is not None:
+            response = await asyncio.get_running_loop().run_in_executor(executor, worker_move, game_state)
+        else:
+            response = calculate_move(game_state)
+    except Exception:
+        # No answer means a timeout for this move, the client keeps going
+        print(f"ERROR: calculateMove failed for game {game_uuid.decode()}")
+        traceback.print_exc()
+        return
+    await server_socket.send_multipart([b'', b'Move', game_uuid, protocol.encode_move(response, encoding)])
+
+async def handle_game_end(on_game_end, game_uuid, summary):
+    try:
+        response = on_game_end(game_uuid.decode(), json.loads(summary))
+        if inspect.isawaitable(response):
+            await response
+    except Exception:
+        print(f"ERROR: onGameEnd failed for game {game_uuid.decode()}")
+        traceback.print_exc()
+
+async def run_client(args):
+    bot_module = load_bot(args.bot_path)
+    calculate_move = bot_module.calculateMove
+    on_game_end = getattr(bot_module, 'onGameEnd', None) # Optional, plain or async, always runs on the event loop
+    is_async = inspect.iscoroutinefunction(calculate_move)
+    executor = None
+    if not is_async and args.workers > 0:
+        executor = ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=[args.bot_path])
+
+    # Generate metadata
+    BOT_REGISTRY_DATA = bot_module.BOT_REGISTRY_DATA
+    SESSION_GUID = str(uuid.uuid4())
+    print(f"SESSION_GUID:{SESSION_GUID}")
+    BOT_REGISTRY_DATA["session_uuid"] = SESSION_GUID
+    BOT_REGISTRY_DATA["full_title"] = "_".join([BOT_REGISTRY_DATA['name'], BOT_REGISTRY_DATA['version'], BOT_REGISTRY_DATA['player']])
+    BOT_REGISTRY_DATA["delta_state"] = not args.full_state
+    BOT_REGISTRY_DATA["encoding"] = 'json' if args.json else protocol.default_encoding()
+    BOT_REGISTRY_DATA["game_over"] = True # Free cached game states as soon as games end
+    # Async bots take as many moves as the server will send, plain ones a couple per worker so none sit idle
+    if args.max_moves is not None:
+        BOT_REGISTRY_DATA["max_concurrent_moves"] = args.max_moves
+    elif is_async:
+        BOT_REGISTRY_DATA["max_concurrent_moves"] = 256
+    else:
+        BOT_REGISTRY_DATA["max_concurrent_moves"] = 2*max(args.workers, 1)
+
+    # Game states by game uuid, used to rebuild full game states from deltas
+    game_cache = protocol.new_game_cache()
+
+    # Set up ZMQ connection
+    context = zmq.asyncio.Context.instance()
+    server_socket = context.socket(zmq.DEALER)
+    server_socket.setsockopt_string(zmq.IDENTITY, SESSION_GUID) # Set ID
+    server_socket.connect(f"tcp://{args.zmq_address}:5555")
+
+    # Send metadata on boot
+    async def register_bot():
+        await server_socket.send_multipart([b'', b'RegisterBot', json.dumps(BOT_REGISTRY_DATA).encode('utf-8')])
+    await register_bot()
+
+    # Hold onto running moves so they don't get garbage collected
+    move_tasks = set()
+
+    print(f"Running {'async' if is_async else 'plain'} bot {BOT_REGISTRY_DATA['full_title']}, {args.workers if executor else 'no'} workers")
+    while True:
+        # Re-register if the server has been quiet for a while so it knows we are still here
+        if await server_socket.poll(int(args.ping_freq_mS)) == 0:
+            await register_bot()
+            continue
+
+        _, messageType, *messageData = await server_socket.recv_multipart()
+        if messageType == b'GameState':
+            game_uuid, game_state = messageData
+            game_state = protocol.decode_game_state(game_state)
+            if BOT_REGISTRY_DATA["delta_state"]:
+                # Rebuild full game state so bots never see deltas, bots get a copy so they can't mess up the cache
+                game_state = protocol.apply_delta_state(game_cache, game_state)
+                if executor is None:
+                    game_state = copy.deepcopy(game_state)
+            task = asyncio.create_task(handle_move(server_socket, calculate_move, executor, game_uuid, game_state, BOT_REGISTRY_DATA["encoding"]))
+            move_tasks.add(task)
+            task.add_done_callback(move_tasks.discard)
+        elif messageType == b'GameOver':
+            game_uuid, summary = messageData
+            protocol.forget_game(game_cache, game_uuid.decode())
+            if on_game_end is not None:
+                task = asyncio.create_task(handle_game_end(on_game_end, game_uuid, summary))
+                move_tasks.add(task)
+                task.add_done_callback(move_tasks.discard)
+        elif messageType == b'Print':
+            print(f"Received: {messageData[0].decode('utf-8')}")
+        elif messageType == b'Ping':
+            await server_socket.send_multipart([b'', b'Ping'])
+            print('Server pinged, game may start soon   ', end='\r', flush=True)
+        else:
+            print(f"WARNING: Unhandled message type {messageType}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("zmq_address", help="Address to start ZMQ on")
+    parser.add_argument("bot_path", help="Python file containing bot info")
+    parser.add_argument("-w", "--workers", default=os.cpu_count(), type=int, help="Processes to run a plain calculateMove on, 0 runs it on the event loop (default is one per core, unused by async bots)")
+    parser.add_argument("-m", "--max_moves", default=None, type=int, help="Most moves to work on at once, the server holds the rest (default is 256 for async bots, 2 per worker otherwise)")
+    parser.add_argument("-p", "--ping_freq_mS", default=10000, help="How frequently to ping server (default is 10 seconds)")
+    parser.add_argument("--full_state", action='store_true', help="Have the server send the full game state every move instead of just what changed")
+    parser.add_argument("--json", action='store_true', help="Use json for every message instead of the compact binary encoding")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_client(args))
+    except KeyboardInterrupt:
+        print("Shutting down...")
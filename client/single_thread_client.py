@@ -10,10 +10,13 @@ import importlib.util
 from pathlib import Path
 import socket
 
+import protocol
+
 parser = argparse.ArgumentParser()
 parser.add_argument("zmq_address", help="Address to start ZMQ on")
 parser.add_argument("bot_path", help="Python file containing bot info")
 parser.add_argument("-p", "--ping_freq_mS", default=10000, help="How frequently to ping server (default is 10 seconds)")
+parser.add_argument("--json", action='store_true', help="Use json for every message instead of the compact binary encoding")
 args = parser.parse_args()
 
 # Import library specified as argument
@@ -31,6 +34,7 @@ SESSION_GUID = str(uuid.uuid4())
 print(f"SESSION_GUID:{SESSION_GUID}")
 BOT_REGISTRY_DATA["session_uuid"] = SESSION_GUID
 BOT_REGISTRY_DATA["full_title"] = "_".join([BOT_REGISTRY_DATA['name'], BOT_REGISTRY_DATA['version'], BOT_REGISTRY_DATA['player']])
+BOT_REGISTRY_DATA["encoding"] = 'json' if args.json else protocol.default_encoding()
 
 # Set up ZMQ connection
 context = zmq.Context.instance()
@@ -66,8 +70,8 @@ while True:
                 # Receive game state and get response
                 game_uuid = messageData[0]
                 game_state = messageData[1]
-                response = CalculateMove(json.loads(game_state))
-                server_socket.send_multipart([b'', b'Move', game_uuid, json.dumps(response).encode('utf-8')])
+                response = CalculateMove(protocol.decode_game_state(game_state))
+                server_socket.send_multipart([b'', b'Move', game_uuid, protocol.encode_move(response, BOT_REGISTRY_DATA["encoding"])])
             elif messageType == b'Print':
                 print(f"Received: {messageData[0].decode('utf-8')}")
             elif messageType == b'Ping':
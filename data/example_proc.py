@@ -9,12 +9,12 @@ plt.style.use('dark_background')
 # Load all log tables
 log_path = Path('logs')
 
-tourney = pd.read_parquet(log_path / 'tourney.parquet')
-game = pd.read_parquet(log_path / 'game.parquet')
-tourney_results = pd.read_parquet(log_path / 'tourney_results.parquet')
-game_results = pd.read_parquet(log_path / 'game_results.parquet')
-move_results = pd.read_parquet(log_path / 'move_results.parquet')
-hands = pd.read_parquet(log_path / 'hands.parquet')
+tourney = pd.read_parquet(log_path / 'tourney')
+game = pd.read_parquet(log_path / 'game')
+tourney_results = pd.read_parquet(log_path / 'tourney_results')
+game_results = pd.read_parquet(log_path / 'game_results')
+move_results = pd.read_parquet(log_path / 'move_results')
+hands = pd.read_parquet(log_path / 'hands')
 client = pd.read_parquet(log_path / 'client.parquet')
 
 # Print all columns in each dataframe
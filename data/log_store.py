@@ -0,0 +1,52 @@
+# Query helpers for the sqlite log database written by server/process_logs.py
+# Turn it on with log_database in the server config, or -d when running process_logs.py on its own
+# Filtering, joins and aggregation happen in the database so scripts only load the rows they plot
+
+import sqlite3
+import pandas as pd
+
+DEFAULT_DATABASE_PATH = 'logs/logs.sqlite'
+
+def query(sql, params=(), database_path=DEFAULT_DATABASE_PATH):
+    # Run any query and get a DataFrame back, read only so a dashboard never holds up the ingestor
+    connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True, timeout=30)
+    try:
+        return pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
+
+def tourney_scores(last_tourneys=None, database_path=DEFAULT_DATABASE_PATH):
+    # Every bot's final score in every tourney along with the tourney index and start time, oldest first
+    sql = """
+        SELECT r.tourney_uuid, r.bot_uuid, r.bot_fullname, r.bot_name, r.bot_player, r.final_score, t.tourney_index, t.start_time
+        FROM tourney_results r
+        JOIN tourney t ON t.tourney_uuid = r.tourney_uuid
+    """
+    params = []
+    if last_tourneys is not None:
+        sql += " WHERE r.tourney_uuid IN (SELECT tourney_uuid FROM tourney ORDER BY start_time DESC LIMIT ?)"
+        params.append(last_tourneys)
+    sql += " ORDER BY t.start_time"
+    return query(sql, params, database_path)
+
+def best_scores(group_column, database_path=DEFAULT_DATABASE_PATH):
+    # Best score per tourney for each bot_fullname or bot_player, players running two bots count their better one
+    if group_column not in ['bot_fullname', 'bot_player']:
+        raise ValueError(f"Can't group scores by {group_column}, use bot_fullname or bot_player")
+    return query(f"""
+        SELECT r.{group_column}, t.tourney_index, MAX(r.final_score) AS final_score
+        FROM tourney_results r
+        JOIN tourney t ON t.tourney_uuid = r.tourney_uuid
+        GROUP BY r.{group_column}, t.tourney_index
+        ORDER BY t.tourney_index
+    """, database_path=database_path)
+
+def move_result_counts(database_path=DEFAULT_DATABASE_PATH):
+    # How many of each move result every bot has, one row per bot and one column per result
+    counts = query("""
+        SELECT c.full_title, m.result, COUNT(*) AS count
+        FROM move_results m
+        LEFT JOIN client c ON c.bot_uuid = m.bot_uuid
+        GROUP BY c.full_title, m.result
+    """, database_path=database_path)
+    return counts.pivot(index='full_title', columns='result', values='count').fillna(0).astype(int)
@@ -0,0 +1,146 @@
+# Head to head matchup counts for every pair of bots, kept as matrices indexed by integer bot ids
+# Each batch of games is packed into padded (games, seats) arrays of bot ids and ranks so every pair in every game gets counted by one np.add.at
+# Counts are split by game size and cached next to the logs, so an update only reads game_results partitions it hasn't counted yet
+
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+CACHE_NAME = '.matchups.npz'
+
+def new_matchups():
+    return {
+        'bot_titles': [], # full_title for each bot id
+        'partitions': [], # game_results partitions already counted
+        'games': np.zeros([0, 0, 0], dtype=np.int64), # [game size, bot id, opponent id] games played against each other
+        'wins': np.zeros([0, 0, 0], dtype=np.int64), # [game size, bot id, opponent id] games bot placed above opponent
+        'rank_sums': np.zeros([0, 0], dtype=np.int64), # [game size, bot id] sum of bot_ranking, used to order bots
+        'rank_counts': np.zeros([0, 0], dtype=np.int64), # [game size, bot id] games played
+    }
+
+def load_matchups(cache_path):
+    if not os.path.exists(cache_path):
+        return new_matchups()
+    with np.load(cache_path) as data:
+        matchups = {key: data[key] for key in data.files}
+    matchups['bot_titles'] = matchups['bot_titles'].tolist()
+    matchups['partitions'] = matchups['partitions'].tolist()
+    return matchups
+
+def save_matchups(matchups, cache_path):
+    # Write to a temp file then rename so a killed run never leaves half a cache
+    cache_path = Path(cache_path)
+    tmp_path = cache_path.parent / f".{cache_path.name}.tmp"
+    with open(tmp_path, 'wb') as file:
+        np.savez(
+            file,
+            **{key: matchups[key] for key in ['games', 'wins', 'rank_sums', 'rank_counts']},
+            bot_titles=np.array(matchups['bot_titles'], dtype=str),
+            partitions=np.array(matchups['partitions'], dtype=str),
+        )
+    os.replace(tmp_path, cache_path)
+
+def grow(matchups, size_count, bot_count):
+    # Pad the matrices out with zeros for new bots or bigger games
+    old_size_count, old_bot_count = matchups['rank_sums'].shape
+    size_count = max(size_count, old_size_count)
+    bot_count = max(bot_count, old_bot_count)
+    for key in ['games', 'wins']:
+        grown = np.zeros([size_count, bot_count, bot_count], dtype=np.int64)
+        grown[:old_size_count, :old_bot_count, :old_bot_count] = matchups[key]
+        matchups[key] = grown
+    for key in ['rank_sums', 'rank_counts']:
+        grown = np.zeros([size_count, bot_count], dtype=np.int64)
+        grown[:old_size_count, :old_bot_count] = matchups[key]
+        matchups[key] = grown
+
+def bot_ids(matchups, titles):
+    # New titles get the next free ids
+    title_ids = {title: idx for idx, title in enumerate(matchups['bot_titles'])}
+    for title in pd.unique(titles):
+        if title not in title_ids:
+            title_ids[title] = len(matchups['bot_titles'])
+            matchups['bot_titles'].append(title)
+    return pd.Series(titles).map(title_ids).to_numpy()
+
+def add_games(matchups, game_uuids, titles, rankings):
+    # One row per bot per game, every bot in a game has to be in the batch
+    if len(game_uuids) == 0:
+        return
+    ids = bot_ids(matchups, titles)
+    game_idx, _ = pd.factorize(np.asarray(game_uuids))
+    order = np.argsort(game_idx, kind='stable')
+    game_idx = game_idx[order]
+    ids = ids[order]
+    rankings = np.asarray(rankings, dtype=np.int64)[order]
+
+    # Pack into padded arrays, seat is the row's position within its game
+    game_sizes = np.bincount(game_idx)
+    seat = np.arange(len(game_idx)) - np.searchsorted(game_idx, game_idx)
+    padded_ids = np.full([len(game_sizes), game_sizes.max()], -1, dtype=np.int64)
+    padded_ranks = np.zeros_like(padded_ids)
+    padded_ids[game_idx, seat] = ids
+    padded_ranks[game_idx, seat] = rankings
+    grow(matchups, game_sizes.max()+1, len(matchups['bot_titles']))
+
+    # Every ordered pair of seats in every game, copies of the same bot don't count against each other
+    bot = padded_ids[:, :, None]
+    opponent = padded_ids[:, None, :]
+    pairs = (bot >= 0) & (opponent >= 0) & (bot != opponent)
+    won = pairs & (padded_ranks[:, :, None] < padded_ranks[:, None, :])
+    pair_sizes = np.broadcast_to(game_sizes[:, None, None], pairs.shape)
+    pair_bots = np.broadcast_to(bot, pairs.shape)
+    pair_opponents = np.broadcast_to(opponent, pairs.shape)
+    np.add.at(matchups['games'], (pair_sizes[pairs], pair_bots[pairs], pair_opponents[pairs]), 1)
+    np.add.at(matchups['wins'], (pair_sizes[won], pair_bots[won], pair_opponents[won]), 1)
+
+    np.add.at(matchups['rank_sums'], (game_sizes[game_idx], ids), rankings)
+    np.add.at(matchups['rank_counts'], (game_sizes[game_idx], ids), 1)
+
+def update_matchups(log_path, client):
+    # Count any game_results partitions not in the cache yet, client maps bot_uuid to full_title
+    log_path = Path(log_path)
+    cache_path = log_path / CACHE_NAME
+    matchups = load_matchups(cache_path)
+
+    partitions = sorted(foo.stem for foo in (log_path / 'game_results').glob('*.parquet') if not foo.name.startswith('.'))
+    if not set(matchups['partitions']).issubset(partitions):
+        # Partitions were deleted or re-ingested, counts can't be trusted anymore
+        matchups = new_matchups()
+    counted = set(matchups['partitions'])
+    new_partitions = [foo for foo in partitions if foo not in counted]
+    if len(new_partitions) == 0:
+        return matchups
+
+    game_results = pd.concat([
+        pd.read_parquet(log_path / 'game_results' / f"{foo}.parquet", columns=['game_uuid', 'bot_uuid', 'bot_ranking']).assign(partition=foo)
+        for foo in new_partitions
+    ])
+    game_results['full_title'] = game_results['bot_uuid'].map(dict(zip(client['bot_uuid'], client['full_title'])))
+
+    # Leave partitions with bots the client table doesn't have yet for the next update
+    missing = game_results.loc[game_results['full_title'].isna(), 'partition'].unique()
+    game_results = game_results[~game_results['partition'].isin(missing)]
+
+    add_games(matchups, game_results['game_uuid'].to_numpy(), game_results['full_title'].to_numpy(), game_results['bot_ranking'].to_numpy())
+    matchups['partitions'] += [foo for foo in new_partitions if foo not in missing]
+    save_matchups(matchups, cache_path)
+    return matchups
+
+def win_ratio(matchups, game_size=None):
+    # Percent of games each bot placed above each opponent, bots ordered by average ranking, best first
+    sizes = slice(None) if game_size is None else slice(game_size, game_size+1)
+    games = matchups['games'][sizes].sum(axis=0)
+    wins = matchups['wins'][sizes].sum(axis=0)
+    rank_sums = matchups['rank_sums'][sizes].sum(axis=0)
+    rank_counts = matchups['rank_counts'][sizes].sum(axis=0)
+
+    played = np.where(rank_counts > 0)[0]
+    order = played[np.argsort(rank_sums[played] / rank_counts[played], kind='stable')]
+    games = games[np.ix_(order, order)]
+    wins = wins[np.ix_(order, order)]
+
+    ratio = 100 * wins / np.maximum(games, 1)
+    ratio[np.arange(len(order)), np.arange(len(order))] = np.nan
+    return ratio, np.array(matchups['bot_titles'], dtype=object)[order]
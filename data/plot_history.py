@@ -1,22 +1,33 @@
 
 import os
+import argparse
 import pandas as pd
 
+import log_store
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-d", "--database_path", default=None, help="Read scores from the sqlite log database instead of the parquets")
+args = parser.parse_args()
+
 import matplotlib.pyplot as plt
 plt.style.use('dark_background')
 
 last_read_time = 0
 
-tourney = pd.read_parquet('logs/tourney.parquet')
-bot_result = pd.read_parquet('logs/bot_result.parquet')
+if args.database_path:
+    # Join and sort happen in the database
+    bot_result = log_store.tourney_scores(database_path=args.database_path)
+else:
+    tourney = pd.read_parquet('logs/tourney')
+    bot_result = pd.read_parquet('logs/tourney_results')
 
-    # print(bot_result)
-    # print(tourney)
+        # print(bot_result)
+        # print(tourney)
 
-print(tourney['tourney_index'])
+    print(tourney['tourney_index'])
 
-bot_result = bot_result.merge(tourney[['tourney_uuid','tourney_index','start_time']], on='tourney_uuid', how='outer')
-bot_result = bot_result.sort_values('start_time')
+    bot_result = bot_result.merge(tourney[['tourney_uuid','tourney_index','start_time']], on='tourney_uuid', how='outer')
+    bot_result = bot_result.sort_values('start_time')
 
 bot_result["print_name"] = bot_result['bot_name'] + ' ' + bot_result['bot_player']
 
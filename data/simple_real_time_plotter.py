@@ -2,11 +2,25 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib import style
 import os
+import argparse
 import pandas as pd
 
 import matplotlib.pyplot as plt
 # plt.style.use('dark_background')
 
+import log_store
+
+# Leaderboard snapshot helper lives with the server
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'server'))
+import leaderboard
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-d", "--database_path", default=None, help="Read scores from the sqlite log database instead of the parquets")
+parser.add_argument("-l", "--leaderboard_address", default=None, help="Poll a running leaderboard (like localhost:5557) instead of reading any logs")
+args = parser.parse_args()
+
 from copy import deepcopy
 
 # fig, ax = plt.subplots(2, sharex=True)
@@ -14,7 +28,7 @@ fig, ax = plt.subplots(2)
 ax1, ax2 = ax
 
 last_read_time = 0
-file_path = 'logs/tourney.parquet'
+file_path = 'logs/tourney'
 
 
 import pandas as pd
@@ -46,7 +60,13 @@ def plot_last_ten_tournaments(df, ax):
         'final_score': 'sum',
         'tourney_index': 'count'
     }).rename(columns={'tourney_index': 'games_played'})
-    
+
+    return plot_score_totals(player_stats, ax)
+
+def plot_score_totals(player_stats, ax):
+    # player_stats is indexed by bot_fullname with columns 'final_score' and 'games_played'
+    player_stats = player_stats.copy()
+
     # Calculate extrapolated scores for players with < 10 games
     player_stats['extrapolated_score'] = player_stats.apply(
         lambda row: (row['final_score'] / row['games_played'] * 10) 
@@ -116,10 +136,17 @@ def plot_last_ten_tournaments(df, ax):
     
     return ax
 
-def animate(i):
-    tourney = pd.read_parquet('logs/tourney.parquet')
+def load_scores():
+    # Best score per tourney for every bot and every player
+    if args.database_path:
+        # The database does the join and groupby so only the aggregated rows come back
+        botPlots = log_store.best_scores('bot_fullname', args.database_path)
+        playerPlots = log_store.best_scores('bot_player', args.database_path)
+        return botPlots, playerPlots
+
+    tourney = pd.read_parquet('logs/tourney')
     bot_result = pd.read_parquet(
-        'logs/bot_result.parquet', 
+        'logs/tourney_results', 
         columns=['tourney_uuid','bot_uuid','bot_fullname', 'bot_name', 'bot_player', 'final_score']
     )
 
@@ -127,25 +154,55 @@ def animate(i):
 
     bot_result = bot_result.sort_values('start_time')
 
+    botPlots = deepcopy(bot_result.groupby(['bot_fullname', 'tourney_index'])['final_score'].max().reset_index())
+    botPlots = botPlots.sort_values('tourney_index')
+
+    playerPlots = bot_result.groupby(['bot_player', 'tourney_index'])['final_score'].max().reset_index()
+    playerPlots = playerPlots.sort_values('tourney_index')
+    return botPlots, playerPlots
+
+def animate_leaderboard():
+    # Totals and cumulative scores come precomputed, only the snapshot goes over the wire
+    snapshot = leaderboard.requestSnapshot(args.leaderboard_address)
+    if snapshot is None:
+        print(f"No answer from leaderboard at {args.leaderboard_address}")
+        return
 
     ax1.cla()
     ax2.cla()
 
-    recent_bots = bot_result[bot_result['tourney_index'] >= bot_result['tourney_index'].max()-10]
-    # for name, subdf in recent_bots.groupby('print_name'):
-    #     ax1.plot(subdf['tourney_index'], subdf['final_score'], label = name)
+    bot_stats = pd.DataFrame({
+        'final_score': [foo['total_score'] for foo in snapshot['bots']],
+        'games_played': [foo['tourney_count'] for foo in snapshot['bots']],
+    }, index=[foo['bot_fullname'] for foo in snapshot['bots']])
+    if len(bot_stats) > 0:
+        plot_score_totals(bot_stats, ax1)
 
-    recent_tourney_idx = bot_result['tourney_index'].max()
+    for player in snapshot['players']:
+        if player['last_tourney_seq'] < snapshot['tourney_count']-1-10:
+            continue
+        cum_scores = np.array(player['cum_scores']).reshape(-1, 2)
+        ax2.plot(cum_scores[:, 0], cum_scores[:, 1], label = player['bot_player'])
+
+    ax2.set_ylabel("Cum Score")
+    ax2.legend(loc='upper left')
+
+def animate(i):
+    if args.leaderboard_address:
+        return animate_leaderboard()
+
+    botPlots, playerPlots = load_scores()
+
+    ax1.cla()
+    ax2.cla()
+
+    recent_tourney_idx = playerPlots['tourney_index'].max()
+    recent_bots = playerPlots[playerPlots['tourney_index'] >= recent_tourney_idx-10]
 
     print(recent_tourney_idx)
 
-    botPlots = deepcopy(bot_result.groupby(['bot_fullname', 'tourney_index'])['final_score'].max().reset_index())
-    botPlots = botPlots.sort_values('tourney_index')
     plot_last_ten_tournaments(botPlots, ax1)
 
-    playerPlots = bot_result.groupby(['bot_player', 'tourney_index'])['final_score'].max().reset_index()
-    playerPlots = playerPlots.sort_values('tourney_index')
-
 
     print(playerPlots)
     for name, subdf in playerPlots.groupby('bot_player'):
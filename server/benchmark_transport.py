@@ -0,0 +1,82 @@
+# Round trip latency between the router and a game engine for each engine transport
+# Mirrors the real hop, a ROUTER on the router side and a DEALER on the engine side bouncing game state sized messages
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+import zmq
+import numpy as np
+from multiprocessing import Process
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-n", "--round_trips", default=20000, type=int, help="Round trips to time per transport (default is 20000)")
+parser.add_argument("-s", "--message_size", default=2000, type=int, help="Bytes per message, roughly one json game state (default is 2000)")
+parser.add_argument("-p", "--port", default=7555, type=int, help="Port to use for the tcp transport (default is 7555)")
+parser.add_argument("-t", "--transports", default="tcp,ipc,inproc", help="Comma separated transports to test (default is tcp,ipc,inproc)")
+args = parser.parse_args()
+
+def echoRouter(bind_address, round_trips, ready, context=None):
+    # Stands in for the router, bounces every message straight back
+    context = context or zmq.Context()
+    router_socket = context.socket(zmq.ROUTER)
+    router_socket.bind(bind_address)
+    if ready is not None:
+        ready.set()
+    for i in range(round_trips):
+        router_socket.send_multipart(router_socket.recv_multipart())
+    router_socket.close()
+
+def timeRoundTrips(context, connect_address, round_trips, message_size):
+    # Stands in for the engine, returns the time of each round trip in seconds
+    engine_socket = context.socket(zmq.DEALER)
+    engine_socket.connect(connect_address)
+    payload = os.urandom(message_size)
+
+    # Warm up so connection setup isn't counted
+    engine_socket.send_multipart([b'', b'MoveRequest', payload])
+    engine_socket.recv_multipart()
+
+    round_trip_times = np.zeros(round_trips - 1)
+    for i in range(round_trips - 1):
+        start_time = time.perf_counter()
+        engine_socket.send_multipart([b'', b'MoveRequest', payload])
+        engine_socket.recv_multipart()
+        round_trip_times[i] = time.perf_counter() - start_time
+    engine_socket.close()
+    return round_trip_times
+
+def benchmarkTransport(transport):
+    if transport == 'tcp':
+        bind_address, connect_address = f"tcp://*:{args.port}", f"tcp://localhost:{args.port}"
+    elif transport == 'ipc':
+        ipc_path = os.path.join(tempfile.gettempdir(), f"liars_dice_benchmark_{os.getpid()}")
+        bind_address, connect_address = f"ipc://{ipc_path}", f"ipc://{ipc_path}"
+    elif transport == 'inproc':
+        bind_address, connect_address = "inproc://benchmark", "inproc://benchmark"
+    else:
+        print(f"ERROR: Transport {transport} does not exist")
+        return
+
+    context = zmq.Context()
+    # inproc needs both ends in one process, the others go across processes like the real engine pool
+    if transport == 'inproc':
+        ready = threading.Event()
+        echo = threading.Thread(target=echoRouter, args=[bind_address, args.round_trips, ready, context], daemon=True)
+        echo.start()
+        ready.wait()
+    else:
+        echo = Process(target=echoRouter, args=[bind_address, args.round_trips, None], daemon=True)
+        echo.start()
+
+    round_trip_times = timeRoundTrips(context, connect_address, args.round_trips, args.message_size)*1e6
+    echo.join(timeout=5)
+    context.term()
+
+    print(f"{transport.ljust(8)} | {np.mean(round_trip_times): 8.1f} | {np.percentile(round_trip_times, 50): 8.1f} | {np.percentile(round_trip_times, 99): 8.1f} | {np.max(round_trip_times): 9.1f}")
+
+print(f"{args.round_trips} round trips of {args.message_size} bytes, times in microseconds")
+print(f"{'transport'.ljust(8)} |     mean |      p50 |      p99 |       max")
+for transport in args.transports.split(','):
+    benchmarkTransport(transport)
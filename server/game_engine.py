@@ -0,0 +1,359 @@
+# Game rules
+# Each game is a plain dict that gets advanced one bot response at a time, so any number of games can be driven from one loop
+# Nothing in here touches sockets, the caller is responsible for sending move requests and collecting responses
+
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import time
+import uuid
+import numpy as np
+
+import matchmaking
+
+DEBUG_INFO = False
+
+def rollNewDice(game):
+    # Roll every die in one go and count faces per player into the game's (players, 6) hand array
+    # Face sums across all players are kept alongside so calls don't have to re-add hands
+    game_state = game['game_state']
+    player_count = game_state['player_count']
+    die_owners = np.repeat(np.arange(player_count), game_state['dice_counts'])
+    die_faces = game['rng'].integers(0, 6, size=len(die_owners))
+    game['current_hands'][:] = np.bincount(die_owners*6 + die_faces, minlength=player_count*6).reshape(player_count, 6)
+    game['face_sums'] = game['current_hands'].sum(axis=0)
+    # Same sums with ones counted towards every other face
+    game['wild_face_sums'] = game['face_sums'].copy()
+    game['wild_face_sums'][1:] += game['face_sums'][0]
+
+def goToLegalPlayer(game_state):
+    nextPlayer = game_state['bot_index']
+    for i in range(game_state["player_count"]*2): # Loop through twice as to never hang
+        if nextPlayer >= game_state["player_count"]:
+            nextPlayer -= game_state["player_count"]
+
+        if game_state["dice_counts"][nextPlayer] > 0:
+            break
+
+        nextPlayer += 1
+
+        if nextPlayer == game_state['bot_index']:
+            print(f"FATAL ERROR All players have no dice \n{game_state['dice_counts']}\n\n{json.dumps(game_state, indent=4)}")
+            exit()
+    game_state['bot_index'] = nextPlayer
+    return game_state
+
+
+def endRound(result, game_state, face_counts, losing_player, calling_player):
+    if DEBUG_INFO:
+        print(f"\nROUND END: {losing_player} {result} {face_counts}")
+        print(f"dice_counts: {game_state['dice_counts']}")
+        for foo in game_state['bid_history']:
+            print(foo)
+
+    # Losing player loses a die but goes first next round
+    game_state["dice_counts"][losing_player] -= 1
+
+    # Record if any player went out
+    if game_state["dice_counts"][losing_player] == 0:
+        game_state["bot_rankings"].append(losing_player)
+
+    # Get who starts next round (assuming players are out) this
+    game_state = goToLegalPlayer(game_state)
+
+    # Reset ones being wild
+    game_state["wild_ones"] = True
+    game_state["first_round"] = True
+
+    # Save current round data as history
+    round_history = {
+        "losing_player": losing_player,
+        "calling_player": calling_player,
+        "result": result,
+        "bid_history": game_state['bid_history'],
+        "face_counts": face_counts,
+    }
+    game_state["round_history"].append(round_history)
+    game_state["bid"] = [0, 6]
+    game_state["bid_history"] = []
+    game_state["round_count"] += 1
+
+    return game_state
+
+def finishRound(game, result, losing_player, calling_player):
+    # Record the round with everyone's hands and deal out new ones
+    game['game_state'] = endRound(result, game['game_state'], game['current_hands'].tolist(), losing_player, calling_player)
+    rollNewDice(game)
+
+def tourneySeed(base_seed=None, tourney_idx=0):
+    # Seed for one tourney, fresh entropy unless a base seed is set in which case it's derived from the tourney index
+    # Kept to 63 bits so it fits in an int64 column once logged
+    entropy = None if base_seed is None else [base_seed, tourney_idx]
+    return int(np.random.SeedSequence(entropy).generate_state(1, np.uint64)[0] >> 1)
+
+def diceRng(game_seed):
+    # Dice come from the second stream spawned off the game seed, the first is unused and only kept so existing seeds roll the same dice
+    _, dice_seed = np.random.SeedSequence(game_seed).spawn(2)
+    return np.random.default_rng(dice_seed)
+
+def newGame(dice_count, do_drop_wilds, player_uuids, tourney_uuid, game_seed):
+    player_count = len(player_uuids)
+    game_uuid = str(uuid.uuid4())
+    game_state =  {
+        "bid": [0, 6], # Any raise will be a legal bid
+
+        "player_count": len(player_uuids),
+        "dice": [0, 0, 0, 0, 0, 0], # Updated on message send
+        "dice_counts": [dice_count for _ in range(player_count)],
+        "bot_index": 0,
+        "wild_ones": True,
+        "first_round": True,
+
+        "bid_history": [],
+        "round_count": 0,
+
+        "round_history": [],
+        "bot_rankings": [],
+
+        "game_uuid": game_uuid
+    }
+
+    game = {
+        "game_state": game_state,
+        "current_hands": np.zeros((player_count, 6), dtype=np.int64),
+        "face_sums": None,
+        "wild_face_sums": None,
+        "rng": diceRng(game_seed),
+        "game_seed": game_seed,
+        "ping_times": [[] for _ in range(player_count)],
+
+        "dice_count": dice_count,
+        "do_drop_wilds": do_drop_wilds,
+        "player_uuids": player_uuids,
+        "game_uuid": game_uuid,
+        "tourney_uuid": tourney_uuid,
+
+        "start_timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "start_time": time.time(),
+    }
+    rollNewDice(game)
+    return game
+
+def moveRequest(game):
+    # Returns which bot is up and the game state to send them
+    game_state = game['game_state']
+    game_state['dice'] = game['current_hands'][game_state['bot_index']].tolist()
+    return game['player_uuids'][game_state['bot_index']], game_state
+
+def handleResponse(game, response, response_ping):
+    # Apply a bot's response to the game, returns a message for the bot if it needs to be told off
+    # Response is either raw json or a response dict that was already decoded from a binary move
+    game_state = game['game_state']
+    bot_index = game_state['bot_index']
+    game['ping_times'][bot_index].append(response_ping)
+    bot_message = None
+
+    # Set last bidder if not first bid
+    if len(game_state['bid_history']) > 0:
+        last_bidder = game_state['bid_history'][-1][2]
+    else:
+        last_bidder = bot_index
+
+    # Sanitize response input
+    okayResponse = True
+    try:
+        if isinstance(response, (bytes, str)):
+            response = json.loads(response)
+        if 'response_type' not in response: okayResponse = False
+        elif response['response_type'] not in ['call', 'bid'] : okayResponse = False
+        elif response['response_type'] == 'bid':
+            if 'bid' not in response: okayResponse = False
+            elif response['bid'][0] <= 0: okayResponse = False
+            elif response['bid'][1] > 6: okayResponse = False
+    except:
+        okayResponse = False
+
+    # Current bot loses if the response is bad
+    if not okayResponse:
+        finishRound(game, "error_bad_response", bot_index, bot_index)
+        # Response may still be raw bytes if it was not valid json
+        if isinstance(response, bytes):
+            response = response.decode('utf-8', errors='replace')
+        bot_message = f"Bad response: {json.dumps(response)}"
+
+    # if call, calculate if it is correct
+    elif response['response_type'] == 'call':
+        # Count ones if wild
+        dice_sums = game['wild_face_sums'] if game_state['wild_ones'] else game['face_sums']
+
+        bidRealValue = dice_sums[game_state['bid'][1]-1] # subtract 1 for zero indexing
+        # actually check if bid was legitimate
+        if bidRealValue >= game_state['bid'][0]:
+            finishRound(game, "bad_call", bot_index, bot_index)
+        else:
+            finishRound(game, "good_call", last_bidder, bot_index)
+
+    elif response['response_type'] == 'bid':
+        # Update wild ones status before we do anything else
+        if game_state["first_round"] and response['bid'][1] == 1 and game['do_drop_wilds']:
+            game_state["wild_ones"] = False
+
+        # If bids have been place and current bot was first player, first round is over
+        if len(game_state["bid_history"]) > 0 and game_state["bid_history"][-1][2] == bot_index:
+            game_state["first_round"] = False
+
+        # Append bot index to end of history
+        game_state['bid_history'].append([response['bid'][0], response['bid'][1], bot_index])
+
+        # Count cannot ever decrease
+        if response['bid'][0] < game_state['bid'][0]:
+            finishRound(game, "error_lower_count", bot_index, bot_index)
+
+        # If count is the same, face must increase
+        elif response['bid'][0] == game_state['bid'][0] and response['bid'][1] <= game_state['bid'][1]:
+            finishRound(game, "error_increase_face", bot_index, bot_index)
+
+        # Cannot bid more dice than exist
+        elif response['bid'][0] > sum(game_state['dice_counts']):
+            finishRound(game, "error_overflow", bot_index, bot_index)
+
+        # Move was successful, update info and pass turn
+        else:
+            # Update bid
+            game_state['bid'] = [response['bid'][0], response['bid'][1]]
+
+            # Pass to next player
+            game_state['bot_index'] += 1
+            game_state = goToLegalPlayer(game_state)
+
+    return bot_message
+
+def handleTimeout(game, response_ping):
+    # Current bot loses the round if it did not respond in time
+    bot_index = game['game_state']['bot_index']
+    game['ping_times'][bot_index].append(response_ping)
+    finishRound(game, "error_timeout", bot_index, bot_index)
+
+def isGameOver(game):
+    # Game is over once only one bot has dice
+    return sum(game['game_state']['dice_counts']) == max(game['game_state']['dice_counts'])
+
+def isGameTimedOut(game, game_timeout_mS):
+    return (time.time() - game['start_time'])*1000 > game_timeout_mS
+
+def buildGameLog(game):
+    game_state = game['game_state']
+
+    # Add winner to rankings
+    game_state["bot_rankings"].append(game_state['bot_index'])
+    game_state["bot_rankings"].reverse() # Index 0 is winner and so on
+
+    game_log = {
+        "game_history": game_state['round_history'],
+        "bot_rankings": game_state["bot_rankings"],
+
+        "bot_count": len(game['player_uuids']),
+        "dice_count": game['dice_count'],
+        "wild_ones_drop": game['do_drop_wilds'],
+
+        "bot_uuids": [str(foo.decode()) for foo in game['player_uuids']],
+        "game_uuid": game['game_uuid'],
+        "tourney_uuid": game['tourney_uuid'],
+        "game_seed": game['game_seed'],
+
+        "start_time": game['start_timestamp'],
+        "end_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "ping_averages_mS": [1000*np.average(arr) if len(arr) > 0 else 0 for arr in game['ping_times']],
+        "ping_maximums_mS": [1000*np.max(arr) if len(arr) > 0 else 0 for arr in game['ping_times']]
+    }
+    return game_log
+
+def gameResult(game_log):
+    # The parts of a game log needed to score a tourney, so full logs don't have to be held until it ends
+    return {key: game_log[key] for key in ['game_uuid', 'bot_uuids', 'bot_rankings', 'bot_count']}
+
+def gameLogPath(log_path, tourney_uuid, game_uuid):
+    # Game logs are written one file each as games finish, grouped by tourney
+    return Path(log_path) / "json" / "games" / tourney_uuid / f"{game_uuid}.json"
+
+def writeLogFile(file_path, data):
+    # Write to a dot prefixed temp file and rename it into place so readers never see half a file
+    file_path = Path(file_path)
+    temp_path = file_path.parent / f".{file_path.name}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, file_path)
+
+def writeGameLog(log_path, tourney_uuid, game_uuid, game_log_bytes):
+    file_path = gameLogPath(log_path, tourney_uuid, game_uuid)
+    os.makedirs(file_path.parent, exist_ok=True)
+    writeLogFile(file_path, game_log_bytes)
+
+def tourneyGameSeeds(tourney_seed, game_count):
+    return np.random.default_rng(tourney_seed).integers(0, 2**63, size=game_count).tolist()
+
+def planTourneyGames(bot_uuids, server_config, tourney_seed):
+    # Returns [bot uuids, game seed] for every game, game seeds are drawn from the tourney seed
+    # Tables are planned for the whole tourney by the matchmaker, which draws from its own stream off the tourney seed
+    tables = matchmaking.planTourney(bot_uuids, server_config['player_count'], server_config['games_per_tourney_per_bot'], tourney_seed)
+    return [[table, game_seed] for table, game_seed in zip(tables, tourneyGameSeeds(tourney_seed, len(tables)))]
+
+def scoreTourney(game_results, bot_uuid_str, server_config):
+    # Returns each bot's [rankings, game sizes] and its score for the tourney
+    results_by_bot = {foo:[[], []] for foo in bot_uuid_str}
+    for log in game_results:
+        for botIdx, fooUuid in enumerate(log['bot_uuids']):
+            results_by_bot[fooUuid][0].append(log['bot_rankings'][botIdx])
+            results_by_bot[fooUuid][1].append(log['bot_count'])
+
+    # Score games
+    tourney_score = [0.0 for _ in bot_uuid_str]
+    if server_config['scoring_method'] == '531':
+        # 531 scoring is first gets 5 points, second 3, and third 1
+        for botIdx, fooUuid in enumerate(bot_uuid_str):
+            rankings = np.array(results_by_bot[fooUuid][0])
+            tourney_score[botIdx] += 5*len(np.where(rankings == 0)[0])
+            tourney_score[botIdx] += 3*len(np.where(rankings == 1)[0])
+            tourney_score[botIdx] += 1*len(np.where(rankings == 2)[0])
+    elif server_config['scoring_method'] == 'even':
+        for botIdx, fooUuid in enumerate(bot_uuid_str):
+            rankings = np.array(results_by_bot[fooUuid])
+            # Flip so first gets 1 point, last gets 0, and the spread is even between them
+            rankings[1] -= 1 # 
+            tourney_score[botIdx] = np.sum((rankings[1] - rankings[0]) / rankings[1])
+    else:
+        print(f"ERROR: Scoring method {server_config['scoring_method']} does not exist")
+
+    # Add score mult
+    tourney_score = [score * server_config['score_mult'] for score in tourney_score]
+    return results_by_bot, tourney_score
+
+def buildTourneyLog(server_config, game_count, bot_uuid_str, bot_metadata, results_by_bot, tourney_score, game_results, tourney_uuid, tourney_idx, tourney_seed, tourney_start_time):
+    # Only the summary, full game logs are written separately as each game finishes
+    tourney_log = {
+        "tourney_tag": server_config['tourney_tag'],
+        "tourney_game_count": game_count,
+        "scoring_method": server_config['scoring_method'],
+        "score_multiplier": server_config['score_mult'],
+        "player_count": server_config['player_count'],
+        "tourney_seed": tourney_seed,
+        "games_per_bot": server_config['games_per_tourney_per_bot'],
+        "matchmaking": "balanced",
+
+        "results_by_bot": results_by_bot,
+        "bot_fullnames": [foo['full_title'] for foo in bot_metadata],
+        "bot_player": [foo['player'] for foo in bot_metadata],
+        "bot_name": [foo['name'] for foo in bot_metadata],
+        "bot_version": [foo['version'] for foo in bot_metadata],
+        "bot_scores": tourney_score,
+        "bot_count": len(bot_uuid_str),
+
+        "start_time": tourney_start_time,
+        "end_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "tourney_uuid": tourney_uuid,
+        "tourney_index": tourney_idx,
+        "bot_uuids": bot_uuid_str,
+        "game_uuids": [log['game_uuid'] for log in game_results],
+    }
+    return tourney_log
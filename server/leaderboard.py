@@ -0,0 +1,164 @@
+# Live leaderboard
+# Subscribes to the server's log broadcast and keeps running scores per bot and per player, updated once per tourney
+# Serves json snapshots over a REP socket so dashboards poll a few KB instead of re-reading every log
+# Runs inside the server when leaderboard_port is set, or on its own against any server's log port
+
+from collections import deque
+from pathlib import Path
+import argparse
+import json
+import os
+import zmq
+import pandas as pd
+
+# Number of tourneys in the recent scores window
+RECENT_WINDOW = 10
+# Cumulative score points sent per bot or player unless the request asks for a different amount
+DEFAULT_HISTORY = 100
+# Most cumulative score points kept per bot or player, older ones are dropped so a long running server doesn't grow forever
+MAX_HISTORY = 1000
+
+def newLeaderboard():
+    return {
+        "tourney_count": 0,
+        "last_tourney": None,
+        "bots": {}, # Entries by bot full name
+        "players": {}, # Entries by player
+    }
+
+def updateEntry(entries, key, tourney_seq, score, bot_player):
+    entry = entries.get(key)
+    if entry is None:
+        entry = {
+            "bot_player": bot_player,
+            "total_score": 0.0,
+            "tourney_count": 0,
+            "last_tourney_seq": -1,
+            "recent_scores": deque(maxlen=RECENT_WINDOW),
+            "cum_scores": deque(maxlen=MAX_HISTORY), # [tourney seq, total score after it] for the last MAX_HISTORY tourneys played
+        }
+        entries[key] = entry
+    entry["total_score"] += score
+    entry["tourney_count"] += 1
+    entry["last_tourney_seq"] = tourney_seq
+    entry["recent_scores"].append(score)
+    entry["cum_scores"].append([tourney_seq, entry["total_score"]])
+
+def addTourney(leaderboard, tourney_uuid, tourney_index, end_time, bot_fullnames, bot_players, bot_scores):
+    # Tourneys are numbered in the order they come in since tourney indices restart with the server
+    tourney_seq = leaderboard["tourney_count"]
+    leaderboard["tourney_count"] += 1
+    leaderboard["last_tourney"] = {"tourney_uuid": tourney_uuid, "tourney_index": tourney_index, "end_time": end_time, "tourney_seq": tourney_seq}
+
+    # Bots running more than one copy and players running more than one bot count their best score
+    best_by_bot = {}
+    best_by_player = {}
+    for name, player, score in zip(bot_fullnames, bot_players, bot_scores):
+        if name not in best_by_bot or score > best_by_bot[name][1]:
+            best_by_bot[name] = [player, score]
+        best_by_player[player] = max(score, best_by_player.get(player, score))
+
+    for name, (player, score) in best_by_bot.items():
+        updateEntry(leaderboard["bots"], name, tourney_seq, score, player)
+    for player, score in best_by_player.items():
+        updateEntry(leaderboard["players"], player, tourney_seq, score, player)
+
+def loadHistory(leaderboard, log_path):
+    # Replay ingested tourneys in the order they were played so a restarted leaderboard picks up where it left off
+    log_path = Path(log_path)
+    if not os.path.isdir(log_path / 'tourney') or not os.path.isdir(log_path / 'tourney_results'):
+        return
+    tourney = pd.read_parquet(log_path / 'tourney', columns=['tourney_uuid', 'tourney_index', 'end_time'])
+    tourney_results = pd.read_parquet(log_path / 'tourney_results', columns=['tourney_uuid', 'bot_fullname', 'bot_player', 'final_score'])
+    tourney = tourney.sort_values('end_time')
+    results_by_tourney = dict(list(tourney_results.groupby('tourney_uuid')))
+    for tourney_uuid, tourney_index, end_time in zip(tourney['tourney_uuid'], tourney['tourney_index'], tourney['end_time']):
+        results = results_by_tourney.get(tourney_uuid)
+        if results is None:
+            continue
+        addTourney(leaderboard, tourney_uuid, int(tourney_index), str(end_time), results['bot_fullname'].tolist(), results['bot_player'].tolist(), results['final_score'].tolist())
+
+def snapshotEntries(entries, key_name, history):
+    return [{
+        key_name: key,
+        "bot_player": entry["bot_player"],
+        "total_score": entry["total_score"],
+        "tourney_count": entry["tourney_count"],
+        "last_tourney_seq": entry["last_tourney_seq"],
+        "recent_scores": list(entry["recent_scores"]),
+        "recent_score": sum(entry["recent_scores"]),
+        "cum_scores": list(entry["cum_scores"])[-history:] if history > 0 else [],
+    } for key, entry in entries.items()]
+
+def snapshot(leaderboard, history=DEFAULT_HISTORY):
+    return {
+        "tourney_count": leaderboard["tourney_count"],
+        "last_tourney": leaderboard["last_tourney"],
+        "recent_window": RECENT_WINDOW,
+        "bots": snapshotEntries(leaderboard["bots"], "bot_fullname", history),
+        "players": snapshotEntries(leaderboard["players"], "bot_player", history),
+    }
+
+def runLeaderboard(logs_address, leaderboard_port, log_path=None, context=None):
+    # Serve snapshots on leaderboard_port while following the log broadcast at logs_address
+    context = context or zmq.Context.instance()
+    leaderboard = newLeaderboard()
+    if log_path is not None:
+        loadHistory(leaderboard, log_path)
+
+    log_socket = context.socket(zmq.SUB)
+    log_socket.connect(f"tcp://{logs_address}")
+    log_socket.setsockopt(zmq.SUBSCRIBE, b"TourneyLog")
+
+    request_socket = context.socket(zmq.REP)
+    request_socket.bind(f"tcp://*:{leaderboard_port}")
+
+    poller = zmq.Poller()
+    poller.register(log_socket, zmq.POLLIN)
+    poller.register(request_socket, zmq.POLLIN)
+
+    print(f"Leaderboard serving on {leaderboard_port} with {leaderboard['tourney_count']} tourneys of history")
+    while True:
+        socks = dict(poller.poll(1000))
+
+        if log_socket in socks:
+            messageType, *messageData = log_socket.recv_multipart()
+            if messageType == b'TourneyLog':
+                tourney_log = json.loads(messageData[0])
+                addTourney(
+                    leaderboard, tourney_log['tourney_uuid'], tourney_log['tourney_index'], tourney_log['end_time'],
+                    tourney_log['bot_fullnames'], tourney_log['bot_player'], tourney_log['bot_scores']
+                )
+
+        if request_socket in socks:
+            # Request is a json object of options, anything unreadable gets the default snapshot
+            request = request_socket.recv()
+            try:
+                history = int(json.loads(request).get('history', DEFAULT_HISTORY))
+            except Exception:
+                history = DEFAULT_HISTORY
+            request_socket.send(json.dumps(snapshot(leaderboard, history)).encode('utf-8'))
+
+def requestSnapshot(leaderboard_address, history=DEFAULT_HISTORY, timeout_mS=2000, context=None):
+    # Fetch one snapshot, returns None if the leaderboard doesn't answer in time
+    context = context or zmq.Context.instance()
+    request_socket = context.socket(zmq.REQ)
+    request_socket.setsockopt(zmq.LINGER, 0)
+    request_socket.setsockopt(zmq.RCVTIMEO, timeout_mS)
+    request_socket.connect(f"tcp://{leaderboard_address}")
+    try:
+        request_socket.send(json.dumps({'history': history}).encode('utf-8'))
+        return json.loads(request_socket.recv())
+    except zmq.Again:
+        return None
+    finally:
+        request_socket.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-a", "--logs_address", default="localhost:5556", help="Server log broadcast to follow (default is localhost:5556)")
+    parser.add_argument("-p", "--port", default=5557, type=int, help="Port to serve snapshots on (default is 5557)")
+    parser.add_argument("-l", "--log_path", default=None, help="Load ingested tourney parquets from here on startup (default is start empty)")
+    args = parser.parse_args()
+
+    runLeaderboard(args.logs_address, args.port, args.log_path)
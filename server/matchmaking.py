@@ -0,0 +1,74 @@
+# Balanced matchmaking, every table of a tourney is planned up front
+# Every bot plays the same number of games, spread evenly over the tourney so no bot is left with a pile of games at the end
+# Tables are filled with the opponents each bot has seen least, and seats go to whoever has sat in them least at that table size
+
+import numpy as np
+
+def planningRng(tourney_seed):
+    # Own stream off the tourney seed, game seeds are drawn from the tourney seed directly
+    return np.random.default_rng(np.random.SeedSequence(tourney_seed).spawn(1)[0])
+
+def tableSizes(bot_count, player_count, games_per_bot, rng):
+    # Cycle through every allowed table size in shuffled order until there are enough seats, then shrink tables to fit exactly
+    min_players = player_count[0]
+    max_players = max(min_players, min(bot_count, player_count[1]))
+    allowed_sizes = np.arange(min_players, max_players+1)
+    seat_count = bot_count * games_per_bot
+
+    sizes = []
+    while sum(sizes) < seat_count:
+        sizes += rng.permutation(allowed_sizes).tolist()
+    while sum(sizes) - sizes[-1] >= seat_count:
+        sizes.pop()
+
+    # Take extra seats off the biggest tables, if every table is already minimum size a few bots play one extra game
+    extra_seats = sum(sizes) - seat_count
+    for idx in np.argsort(sizes, kind='stable')[::-1]:
+        shrink = min(extra_seats, sizes[idx] - min_players)
+        sizes[idx] -= shrink
+        extra_seats -= shrink
+    return [int(foo) for foo in rng.permutation(sizes)]
+
+def pickTable(table_size, games_left, pair_counts, priority):
+    # Bots with the most games left always play, ties are broken by who has seen the table least
+    order = np.lexsort((priority, -games_left))
+    cutoff = games_left[order[table_size-1]]
+    table = [int(foo) for foo in order if games_left[foo] > cutoff]
+    candidates = [int(foo) for foo in order if games_left[foo] == cutoff]
+    while len(table) < table_size:
+        seen = pair_counts[np.ix_(candidates, table)].sum(axis=1) if len(table) > 0 else np.zeros(len(candidates))
+        pick = candidates.pop(int(np.argmin(seen))) # argmin takes the first, candidates are already in priority order
+        table.append(pick)
+    return table
+
+def seatTable(table, seat_counts, rng):
+    # Repeatedly hand out the open seat some unseated bot has sat in least compared to its other seats in games this size
+    counts = seat_counts[table].astype(np.float64)
+    counts -= counts.mean(axis=1, keepdims=True)
+    counts += rng.random(counts.shape) / 2 # Random among ties
+    seats = [None] * len(table)
+    for _ in range(len(table)):
+        bot_idx, seat = np.unravel_index(np.argmin(counts), counts.shape)
+        seats[seat] = table[bot_idx]
+        seat_counts[table[bot_idx], seat] += 1
+        counts[bot_idx, :] = np.inf
+        counts[:, seat] = np.inf
+    return seats
+
+def planTourney(bot_uuids, player_count, games_per_bot, tourney_seed):
+    # Returns the bot uuids for every table, in seat order and in the order games should be started
+    rng = planningRng(tourney_seed)
+    bot_count = len(bot_uuids)
+    sizes = tableSizes(bot_count, player_count, games_per_bot, rng)
+
+    games_left = np.full(bot_count, games_per_bot, dtype=np.int64)
+    pair_counts = np.zeros([bot_count, bot_count], dtype=np.int64)
+    seat_counts = {size: np.zeros([bot_count, size], dtype=np.int64) for size in set(sizes)}
+
+    tables = []
+    for size in sizes:
+        table = pickTable(size, games_left, pair_counts, rng.permutation(bot_count))
+        games_left[table] -= 1
+        pair_counts[np.ix_(table, table)] += 1
+        tables.append([bot_uuids[foo] for foo in seatTable(table, seat_counts[size], rng)])
+    return tables
@@ -11,73 +11,235 @@ import os
 import time
 import threading
 import shutil
+import sqlite3
+import queue
+import traceback
+from functools import partial
+from itertools import chain
 from datetime import datetime
-import subprocess
-
-def file_ingestor_thread(folder_path, output_path, process_func, save_func, silence):
-    last_read_time = time.time()
-    data_object = None
-
-    ingested_files = []
-    # Initial object loads
-    for root, dirs, files in os.walk(folder_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            if not silence: print(f"Initial Injestion: {file_path}")
-            ingested_files.append(file_path)
-            data_object = process_func(file_path, data_object)
-    save_func(data_object, output_path)
-
-    # Loop reloading objects
+
+# Bots re-register every time they restart, so client table rewrites are batched up to this often
+CLIENT_FLUSH_PERIOD_S = 2.0
+
+def file_ingestor_thread(folder_path, output_path, process_func, save_func, silence, index_path, file_queue=None, flush_period_S=0, data_object=None):
+    # Log writers write to a dot prefixed temp file and rename it into place, so any json in the folder is complete
+    # Finished files come in on file_queue from the writer in the same process, or the folder is polled without one
+    # Files are saved in batches, at most once every flush_period_S, 0 saves every file as it comes in
+    # Ingested files are kept in an index file so restarts don't re-ingest the whole history
+    ingested_files = load_ingested_index(index_path)
+    index_file = open(index_path, 'a')
+    unsaved_files = []
+    last_flush_time = time.time()
+
+    def flush():
+        save_func(data_object, output_path)
+        # Only files that made it to disk go in the index
+        index_file.write(''.join(foo + '\n' for foo in unsaved_files))
+        index_file.flush()
+        unsaved_files.clear()
+        return time.time()
+
+    # Catch up on anything written while we weren't running
+    for file_path in new_log_files(folder_path, ingested_files):
+        if not silence: print(f"Initial Injestion: {file_path}")
+        data_object = ingest_file(process_func, file_path, data_object, ingested_files, unsaved_files)
+        # Save as we go so a long history never has to sit in memory at once
+        if time.time() - last_flush_time >= flush_period_S:
+            last_flush_time = flush()
+    if len(unsaved_files) > 0:
+        last_flush_time = flush()
+
+    # Loop ingesting new files as they show up
     while True:
-        newFiles = False
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if file_path not in ingested_files and not is_file_open_lsof(file_path):
-                    if not silence: print(f"New File: {file_path}")
-                    data_object = process_func(file_path, data_object)
-                    ingested_files.append(file_path)
-                    newFiles = True
-        if newFiles:
-            save_func(data_object, output_path)
-        time.sleep(0.5)
-
-
-def is_file_open_lsof(filepath):
-    """Check if file is open using lsof command"""
-    result = subprocess.run(['lsof', filepath], 
-                            capture_output=True, 
-                            text=True, 
-                            check=False)
-    return len(result.stdout.strip()) > 0
-    
+        if file_queue is not None:
+            # Wait for the next file, but not past when unsaved files are due to be flushed
+            timeout = None if len(unsaved_files) == 0 else max(0, last_flush_time + flush_period_S - time.time())
+            try:
+                new_files = [file_queue.get(timeout=timeout)]
+            except queue.Empty:
+                new_files = []
+        else:
+            time.sleep(0.5)
+            new_files = new_log_files(folder_path, ingested_files)
+        for file_path in new_files:
+            file_path = str(file_path)
+            if file_path in ingested_files:
+                continue
+            if not silence: print(f"New File: {file_path}")
+            data_object = ingest_file(process_func, file_path, data_object, ingested_files, unsaved_files)
+        if len(unsaved_files) > 0 and time.time() - last_flush_time >= flush_period_S:
+            last_flush_time = flush()
+
+def ingest_file(process_func, file_path, data_object, ingested_files, unsaved_files):
+    # A file that can't be ingested is skipped so one bad log doesn't stop ingestion for good
+    # It stays out of the index, so it gets another try the next time the ingestor starts
+    ingested_files.add(file_path)
+    try:
+        data_object = process_func(file_path, data_object)
+    except Exception:
+        print(f"WARNING: Failed to ingest {file_path}, skipping it")
+        traceback.print_exc()
+        return data_object
+    unsaved_files.append(file_path)
+    return data_object
+
+def new_log_files(folder_path, ingested_files):
+    # Finished jsons in a folder that are not in the index yet, oldest name first
+    if not os.path.isdir(folder_path):
+        return []
+    file_names = sorted(foo for foo in os.listdir(folder_path) if foo.endswith('.json') and not foo.startswith('.'))
+    file_paths = [os.path.join(folder_path, foo) for foo in file_names]
+    return [foo for foo in file_paths if foo not in ingested_files]
+
+def load_ingested_index(index_path):
+    # Index is one ingested file path per line, delete it to re-ingest everything
+    if not os.path.exists(index_path):
+        return set()
+    return set(line.rstrip('\n') for line in open(index_path, 'r') if line.strip())
+
 def load_client_json(file_path, data_object):
+    # Client registry is a dict of client rows by bot uuid, so each registration is one upsert
     # Rename session uuid
     # This is a quick hack to avoid a refactor that would touch players existing bots
     new_client = json.load(open(file_path, 'r'))
     new_client['bot_uuid'] = new_client['session_uuid']
     del new_client['session_uuid']
 
-    new_data = pd.DataFrame([new_client])
+    if data_object is None:
+        data_object = {}
+    data_object[new_client['bot_uuid']] = new_client
+    return data_object
 
-    if data_object is not None:
-        # Return merged dataframes if none
-        return pd.merge(data_object, new_data, how='outer')
-    else:
-        # Return raw data if new
-        return new_data
+def load_client_registry(output_path):
+    # Start from the saved client table, ingestion only picks up new files after a restart
+    if not os.path.exists(output_path):
+        return None
+    clients = pd.read_parquet(output_path).to_dict('records')
+    return {foo['bot_uuid']: foo for foo in clients}
 
 def save_jsons_to_parquet(data_object, output_path):
+    # Bot registry data has free form keys, so the client table is one file with every column seen so far
     if data_object is not None:
-        data_object.to_parquet(str(output_path)+'.tmp')
+        pd.DataFrame(list(data_object.values())).to_parquet(str(output_path)+'.tmp')
         shutil.move(str(output_path)+'.tmp', output_path)
 
 def get_timestamp(timestamp):
     return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
 
+def load_game_logs(file_path, data):
+    # Game logs sit next to the tourney logs in json/games/<tourney_uuid>/, older tourney logs had them inline
+    if 'game_logs' in data:
+        return data['game_logs']
+    # Game logs reach the writer over the log broadcast, which can drop messages, so missing or broken ones are skipped
+    games_path = Path(file_path).parent.parent / 'games' / data['tourney_uuid']
+    game_logs = []
+    for game_uuid in data['game_uuids']:
+        try:
+            game_logs.append(json.load(open(games_path / f"{game_uuid}.json", 'r')))
+        except (OSError, ValueError):
+            print(f"WARNING: Game log {game_uuid} for tourney {data['tourney_uuid']} is missing or unreadable, skipping it")
+    return game_logs
+
+def group_starts(group_lengths):
+    # Index where each group starts when groups are laid out one after another, empty for no groups
+    group_lengths = np.asarray(group_lengths, dtype=np.int64)
+    return np.cumsum(group_lengths) - group_lengths
+
+def round_cumsum(values, round_starts, round_lengths):
+    # Running sum of values that restarts at every round, values are laid out round after round
+    total = np.cumsum(values)
+    before_round = np.concatenate([[0], total])[round_starts]
+    return total - np.repeat(before_round, round_lengths)
+
+# Columns flatten_game_logs fills with text
+TEXT_COLUMNS = ['bot_uuid', 'game_uuid', 'result']
+
+def flatten_game_logs(game_logs):
+    # Turn a tourney's game logs into game_results, move_results and hands tables
+    # Every bid, hand and round is pulled into flat arrays once and the tables are built from whole columns
+    # A tourney where no game finished still gets empty tables with the right columns and types
+    game_uuids = np.array([log['game_uuid'] for log in game_logs], dtype=object)
+    game_bot_counts = np.array([len(log['bot_uuids']) for log in game_logs], dtype=np.int64)
+    game_bot_starts = group_starts(game_bot_counts)
+    # Bot uuids for every seat of every game, index with game_bot_starts[game] + seat
+    seat_uuids = np.array([uuid for log in game_logs for uuid in log['bot_uuids']], dtype=object)
+
+    # One entry per round
+    rounds = [round_log for log in game_logs for round_log in log['game_history']]
+    round_counts = np.array([len(log['game_history']) for log in game_logs], dtype=np.int64)
+    round_games = np.repeat(np.arange(len(game_logs)), round_counts)
+    round_indices = np.arange(len(rounds)) - np.repeat(group_starts(round_counts), round_counts)
+    round_bid_counts = np.array([len(foo['bid_history']) for foo in rounds], dtype=np.int64)
+    round_bid_starts = group_starts(round_bid_counts)
+    round_results = np.array([foo['result'] for foo in rounds], dtype=object)
+    round_callers = np.array([foo['calling_player'] for foo in rounds], dtype=np.int64)
+
+    # One entry per bid as [count, face, bot index]
+    bids = np.fromiter(chain.from_iterable(chain.from_iterable(foo['bid_history'] for foo in rounds)), dtype=np.float64).reshape(-1, 3)
+    bid_rounds = np.repeat(np.arange(len(rounds)), round_bid_counts)
+    bid_positions = np.arange(len(bids)) - round_bid_starts[bid_rounds]
+    bid_bots = bids[:, 2].astype(np.int64)
+
+    # Ones stop being wild when ones are bid after the opening bid, up to and including the first bidder's next bid
+    # Only bids before the final one count, matching what players saw when the round was called
+    is_first_bidder = (bid_positions > 0) & (bid_bots == bid_bots[round_bid_starts[bid_rounds]])
+    first_bidder_before = round_cumsum(is_first_bidder, round_bid_starts, round_bid_counts) - is_first_bidder
+    is_uncalled = bid_positions < round_bid_counts[bid_rounds] - 1
+    drops_wilds = (bids[:, 1] == 1) & (bid_positions > 0) & (first_bidder_before == 0) & is_uncalled
+    bid_wild_ones = round_cumsum(drops_wilds, round_bid_starts, round_bid_counts) == 0
+    round_wild_ones = np.bincount(bid_rounds, weights=drops_wilds, minlength=len(rounds)) == 0
+
+    # Every round logs its uncalled bids, then the call or error that ended it, then the last bid judged by that call
+    final_rounds = np.where(round_bid_counts > 0)[0]
+    final_bids = round_bid_starts[final_rounds] + round_bid_counts[final_rounds] - 1
+    final_bid_results = np.full(len(final_rounds), 'uncalled_bid', dtype=object)
+    final_bid_results[round_results[final_rounds] == 'good_call'] = 'bad_bid'
+    final_bid_results[round_results[final_rounds] == 'bad_call'] = 'good_bid'
+    uncalled = np.where(is_uncalled)[0]
+
+    move_rounds = np.concatenate([bid_rounds[uncalled], np.arange(len(rounds)), final_rounds])
+    move_bid_indices = np.concatenate([bid_positions[uncalled], round_bid_counts, round_bid_counts[final_rounds] - 1])
+    move_bots = np.concatenate([bid_bots[uncalled], round_callers, bid_bots[final_bids]])
+    # Calls come between the uncalled bids and the final bid
+    move_order = np.lexsort((np.concatenate([bid_positions[uncalled], round_bid_counts - 1, round_bid_counts[final_rounds]]), move_rounds))
+    move_rounds = move_rounds[move_order]
+    move_results = pd.DataFrame({
+        'game_uuid': game_uuids[round_games[move_rounds]],
+        'round_index': round_indices[move_rounds],
+        'bid_index': move_bid_indices[move_order],
+        'bot_uuid': seat_uuids[game_bot_starts[round_games[move_rounds]] + move_bots[move_order]],
+        'result': np.concatenate([np.full(len(uncalled), 'uncalled_bid', dtype=object), round_results, final_bid_results])[move_order],
+        'bid_count': np.concatenate([bids[uncalled, 0], np.full(len(rounds), np.nan), bids[final_bids, 0]])[move_order],
+        'bid_face': np.concatenate([bids[uncalled, 1], np.full(len(rounds), np.nan), bids[final_bids, 1]])[move_order],
+        'wild_ones': np.concatenate([bid_wild_ones[uncalled], round_wild_ones, round_wild_ones[final_rounds]])[move_order],
+    })
+
+    # Every bot's hand every round
+    hand_rounds = np.repeat(np.arange(len(rounds)), game_bot_counts[round_games])
+    hand_seats = np.arange(len(hand_rounds)) - np.repeat(group_starts(game_bot_counts[round_games]), game_bot_counts[round_games])
+    hands = np.fromiter(chain.from_iterable(chain.from_iterable(foo['face_counts'] for foo in rounds)), dtype=np.int64).reshape(-1, 6)
+    game_hands = pd.DataFrame({
+        'bot_uuid': seat_uuids[game_bot_starts[round_games[hand_rounds]] + hand_seats],
+        'game_uuid': game_uuids[round_games[hand_rounds]],
+        'round_index': round_indices[hand_rounds],
+    } | {str(face+1): hands[:, face] for face in range(6)})
+
+    # Every bot's result every game
+    seat_games = np.repeat(np.arange(len(game_logs)), game_bot_counts)
+    game_results = pd.DataFrame({
+        'bot_uuid': seat_uuids,
+        'game_uuid': game_uuids[seat_games],
+        'turn_placement': np.arange(len(seat_uuids)) - game_bot_starts[seat_games],
+        'bot_ranking': np.array([rank for log in game_logs for rank in log['bot_rankings']], dtype=np.int64),
+        'ping_average_mS': np.array([ping for log in game_logs for ping in log['ping_averages_mS']], dtype=np.float64),
+        'ping_maximum_mS': np.array([ping for log in game_logs for ping in log['ping_maximums_mS']], dtype=np.float64),
+    })
+    # Text columns are cast explicitly, pandas only infers a string type for them when they have rows
+    return [foo.astype({key: str for key in TEXT_COLUMNS if key in foo}) for foo in [game_results, move_results, game_hands]]
+
 def load_tourney_json(file_path, data_object):
     data = json.load(open(file_path, 'r'))
+    data['game_logs'] = load_game_logs(file_path, data)
     # Build tourney table
     tourney_data = {
         'tourney_tag': [data['tourney_tag']],
@@ -108,13 +270,14 @@ def load_tourney_json(file_path, data_object):
         })
     tourney_results = pd.DataFrame(tourney_results)
 
-    # Log game metadata
+    # Log game metadata, game_index is the game's place in the tourney even if some game logs were skipped
+    game_indices = {game_uuid: i for i, game_uuid in enumerate(data['game_uuids'])}
     game_data = []
-    for i, game_log in enumerate(data['game_logs']):
+    for game_log in data['game_logs']:
         game_data.append({
             'tourney_uuid': data['tourney_uuid'],
-            'game_uuid': data['game_uuids'][i],
-            'game_index': i,
+            'game_uuid': game_log['game_uuid'],
+            'game_index': game_indices[game_log['game_uuid']],
             'bot_count': game_log['bot_count'],
             'dice_count': game_log['dice_count'],
             'wild_ones_drop': game_log['wild_ones_drop'],
@@ -126,96 +289,7 @@ def load_tourney_json(file_path, data_object):
     game_data = pd.DataFrame(game_data)
 
     # Every move's results and each bot's game logs by tourney
-    move_results = []
-    game_results = []
-    game_hands = []
-    for i, game_log in enumerate(data['game_logs']):
-        # Iterate through rounds in game
-        for roundIdx, roundLog in enumerate(game_log['game_history']):
-            # Save each hand played
-            for botIdx, uuid in enumerate(game_log['bot_uuids']):
-                handDict = {
-                    'bot_uuid': uuid,
-                    'game_uuid': game_log['game_uuid'],
-                    'round_index': roundIdx,
-                }
-                handDict |= {str(i): j for i, j in zip(range(1,7), roundLog['face_counts'][botIdx])}
-                game_hands.append(handDict)
-            
-            # Iterate through all bids except for final bid
-            wild_ones = True
-            is_first_go_around = True
-            first_bot_index = 0
-            if len(roundLog['bid_history']) > 0: first_bot_index = roundLog['bid_history'][0][2]
-            for bidIdx, bid in enumerate(roundLog['bid_history'][:-1]):
-                if bidIdx == 0:
-                    first_bot_index = bid[2]
-                elif is_first_go_around:
-                    if bid[1] == 1:
-                        wild_ones = False
-                    if bid[2] == first_bot_index:
-                        is_first_go_around = False
-
-                move_results.append({
-                        'game_uuid': game_log['game_uuid'],
-                        'round_index': roundIdx,
-                        'bid_index': bidIdx,
-                        'bot_uuid': game_log['bot_uuids'][bid[2]],
-                        'result': "uncalled_bid",
-                        'bid_count': bid[0],
-                        'bid_face': bid[1],
-                        'wild_ones': wild_ones,
-                })
-
-            # Save final move
-            move_results.append({
-                'game_uuid': game_log['game_uuid'],
-                'round_index': roundIdx,
-                'bid_index': len(roundLog['bid_history']), # Index is number of bids + 1
-                'bot_uuid': game_log['bot_uuids'][roundLog['calling_player']],
-                'result': roundLog['result'],
-                'bid_count': None,
-                'bid_face': None,
-                'wild_ones': wild_ones,
-            })
-
-            finalBidIdx = len(roundLog['bid_history'])-1
-
-            # Do not log final bid if the game was called instantly
-            if finalBidIdx < 0:
-                continue
-
-            # Set final bid's result by if it was called and if it was true
-            final_bid_result = 'uncalled_bid'
-            if roundLog['result'] == 'good_call': final_bid_result = 'bad_bid'
-            if roundLog['result'] == 'bad_call': final_bid_result = 'good_bid'
-
-            # Save final bid result
-            finalBid = roundLog['bid_history'][-1]
-            move_results.append({
-                'game_uuid': game_log['game_uuid'],
-                'round_index': roundIdx,
-                'bid_index': finalBidIdx,
-                'bot_uuid': game_log['bot_uuids'][finalBid[2]],
-                'result': final_bid_result,
-                'bid_count': finalBid[0],
-                'bid_face': finalBid[1],
-                'wild_ones': wild_ones,
-            })
-
-
-        for botIdx, uuid in enumerate(game_log['bot_uuids']):
-            game_results.append({
-                'bot_uuid': uuid,
-                'game_uuid': game_log['game_uuid'],
-                'turn_placement': botIdx,
-                'bot_ranking': game_log['bot_rankings'][botIdx],
-                'ping_average_mS': game_log['ping_averages_mS'][botIdx],
-                'ping_maximum_mS': game_log['ping_maximums_mS'][botIdx],
-            })
-    game_results = pd.DataFrame(game_results)
-    move_results = pd.DataFrame(move_results)
-    game_hands = pd.DataFrame(game_hands)
+    game_results, move_results, game_hands = flatten_game_logs(data['game_logs'])
 
     # Make new set of dataframes to log
     # The filename is set by this arg
@@ -228,34 +302,111 @@ def load_tourney_json(file_path, data_object):
         'hands': game_hands,
     }
 
-    if data_object is not None:
-        # Return merged dataframes if none
-        for col in data_object:
-            data_object[col] = pd.concat([data_object[col], new_dataframes[col]])
-        return data_object
-    else:
-        # Return raw data if new
-        return new_dataframes
+    # Tourneys are never merged in memory, data_object is just the partitions waiting to be written
+    # Partitions are named after the tourney json so re-ingesting a tourney overwrites its own partition
+    if data_object is None:
+        data_object = []
+    data_object.append((Path(file_path).stem, new_dataframes))
+    return data_object
 
 def save_tourney_parquets(data_object, output_path):
+    # Each table is a directory with one parquet per tourney, so a new tourney only writes its own files
+    # Read a whole table back as one dataset with pd.read_parquet(output_path / table)
     if data_object is None:
         return
-    # Save dataframe to temp file
-    for key, val in data_object.items():
-        val.to_parquet(os.path.join(output_path, key+'.parquet')+'.tmp')
-    # Move all at once to keep in sync
-    for key, val in data_object.items():
-        filepath = os.path.join(output_path, key+'.parquet')
-        shutil.move(filepath+'.tmp', filepath)
-
-# # Test tourney thread
-# file_ingestor_thread('logs/json/tournies', 'logs', load_tourney_json, save_tourney_parquets)
-# exit()
-def log_ingestor_threads(output_path = Path('logs'), silence = True):
+    while len(data_object) > 0:
+        partition, tables = data_object.pop(0)
+        # Save dataframe to temp file, dot prefix keeps readers from picking it up
+        for key, val in tables.items():
+            if len(val) == 0:
+                continue
+            os.makedirs(os.path.join(output_path, key), exist_ok=True)
+            val.to_parquet(os.path.join(output_path, key, '.'+partition+'.parquet.tmp'))
+        # Move all at once to keep in sync, tourney table last so a tourney only shows up once the rest of it is there
+        for key in sorted(tables, key=lambda foo: foo == 'tourney'):
+            if len(tables[key]) == 0:
+                continue
+            os.replace(os.path.join(output_path, key, '.'+partition+'.parquet.tmp'), os.path.join(output_path, key, partition+'.parquet'))
+
+# Columns that get an index in the database wherever a table has them
+DATABASE_INDEX_COLUMNS = ['bot_uuid', 'game_uuid', 'tourney_uuid']
+
+def connect_database(database_path):
+    # WAL lets dashboards read while the ingestor writes
+    connection = sqlite3.connect(database_path, timeout=30)
+    connection.execute('PRAGMA journal_mode=WAL')
+    return connection
+
+def index_database_table(connection, table, columns):
+    for col in DATABASE_INDEX_COLUMNS:
+        if col in columns:
+            connection.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table} ({col})')
+
+def to_sql_columns(df):
+    # sqlite has no list type, list columns like game_scores are stored as json text
+    list_columns = [col for col in df.columns if df[col].dtype == object and len(df) > 0 and isinstance(df[col].iloc[0], (list, np.ndarray))]
+    if len(list_columns) == 0:
+        return df
+    return df.assign(**{col: df[col].map(lambda foo: json.dumps(list(foo))) for col in list_columns})
+
+def save_tourney_sqlite(data_object, database_path):
+    # Each tourney goes in as one transaction, replacing any rows from an earlier ingest of the same tourney
+    connection = connect_database(database_path)
+    existing_tables = set(foo for (foo,) in connection.execute("SELECT name FROM sqlite_master WHERE type='table'"))
+    for partition, tables in data_object:
+        if len(tables['tourney']) == 0:
+            continue
+        tourney_uuid = tables['tourney']['tourney_uuid'].iloc[0]
+        with connection:
+            if 'game' in existing_tables:
+                for key in ['game_results', 'move_results', 'hands']:
+                    if key in existing_tables:
+                        connection.execute(f'DELETE FROM {key} WHERE game_uuid IN (SELECT game_uuid FROM game WHERE tourney_uuid = ?)', [tourney_uuid])
+            for key in ['game', 'tourney_results', 'tourney']:
+                if key in existing_tables:
+                    connection.execute(f'DELETE FROM {key} WHERE tourney_uuid = ?', [tourney_uuid])
+            for key, val in tables.items():
+                if len(val) == 0:
+                    continue
+                to_sql_columns(val).to_sql(key, connection, if_exists='append', index=False)
+                if key not in existing_tables:
+                    index_database_table(connection, key, val.columns)
+                    existing_tables.add(key)
+    connection.close()
+
+def save_client_sqlite(data_object, database_path):
+    # Client table is small and has free form columns, so it is replaced as a whole like the parquet
+    connection = connect_database(database_path)
+    with connection:
+        clients = pd.DataFrame(list(data_object.values()))
+        to_sql_columns(clients).to_sql('client', connection, if_exists='replace', index=False)
+        index_database_table(connection, 'client', clients.columns)
+    connection.close()
+
+def save_tourney_tables(data_object, output_path, database_path=None):
+    # Database goes first since saving the parquets empties the list of partitions
+    if database_path is not None and data_object:
+        save_tourney_sqlite(data_object, database_path)
+    save_tourney_parquets(data_object, output_path)
+
+def save_client_tables(data_object, output_path, database_path=None):
+    if database_path is not None and data_object:
+        save_client_sqlite(data_object, database_path)
+    save_jsons_to_parquet(data_object, output_path)
+
+def log_ingestor_threads(log_path = Path('logs'), silence = True, poll = False, database_path = None):
+    # Starts ingesting client and tourney jsons under log_path into parquets
+    # Returns the queues to put finished client and tourney json paths on, by folder name
+    # With poll the folders are scanned instead, for when the logs are written by some other process
+    # With a database_path every table is also written to that sqlite database, see data/log_store.py for querying it
+    log_path = Path(log_path)
+    os.makedirs(log_path, exist_ok=True)
+    file_queues = {'clients': None if poll else queue.Queue(), 'tournies': None if poll else queue.Queue()}
+
     if not silence: print(f"Starting client_logger_thread")
     client_logger_thread = threading.Thread(
                 target=file_ingestor_thread, 
-                args=['logs/json/clients', output_path / 'client.parquet', load_client_json, save_jsons_to_parquet, silence],
+                args=[str(log_path / 'json' / 'clients'), log_path / 'client.parquet', load_client_json, partial(save_client_tables, database_path=database_path), silence, log_path / '.ingested_clients', file_queues['clients'], CLIENT_FLUSH_PERIOD_S, load_client_registry(log_path / 'client.parquet')],
                 name=f"client_logger_thread",
                 daemon=True
             )
@@ -264,24 +415,22 @@ def log_ingestor_threads(output_path = Path('logs'), silence = True):
     if not silence: print(f"Starting tourney_logger_thread")
     tourney_logger_thread = threading.Thread(
                 target=file_ingestor_thread, 
-                args=['logs/json/tournies', output_path, load_tourney_json, save_tourney_parquets, silence],
+                args=[str(log_path / 'json' / 'tournies'), log_path, load_tourney_json, partial(save_tourney_tables, database_path=database_path), silence, log_path / '.ingested_tournies', file_queues['tournies']],
                 name=f"tourney_logger_thread",
                 daemon=True
             )
     tourney_logger_thread.start()
+    return file_queues
 
 if __name__ == '__main__':
-    # Test client handler
-    if False:
-        file_ingestor_thread('logs/json/clients', Path('logs') / 'client.parquet', load_client_json, save_jsons_to_parquet, False)
-    
-    # Test tourney handler
-    if False:
-        file_ingestor_thread('logs/json/tournies', Path('logs'), load_tourney_json, save_tourney_parquets, False)
-
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-l", "--log_path", default='logs', help="Folder with the json logs to ingest (default is logs)")
+    parser.add_argument("-d", "--database_path", default=None, help="Also write every table to this sqlite database (default is parquets only)")
+    args = parser.parse_args()
 
+    # Nothing in this process writes logs, so watch the folders instead
+    log_ingestor_threads(Path(args.log_path), silence = False, poll = True, database_path = args.database_path)
 
-    log_ingestor_threads(silence = False)
 
     # Main thread sleeps forever
     while True: time.sleep(10)
\ No newline at end of file
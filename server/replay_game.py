@@ -0,0 +1,109 @@
+# Replay recorded games from their seeds and the bot responses in their logs
+# Seating and dice are rebuilt from the seeds, moves are fed back through the game rules, and every round is checked against the log
+# Any difference means the game rules or the seeding changed since the game was played
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import game_engine
+
+parser = argparse.ArgumentParser()
+parser.add_argument("tourney_path", help="Tourney json to replay games from")
+parser.add_argument("-g", "--game_uuids", nargs='+', default=None, help="Only replay these games (default is every game in the tourney)")
+parser.add_argument("-v", "--verbose", action='store_true', help="Print every move as it is replayed")
+args = parser.parse_args()
+
+def replayGame(game_log, verbose=False):
+    # Returns a list of differences between the replay and the log, empty if the game played out the same
+    player_uuids = [foo.encode('utf-8') for foo in game_log['bot_uuids']]
+    game = game_engine.newGame(game_log['dice_count'], game_log['wild_ones_drop'], player_uuids, game_log['tourney_uuid'], game_log['game_seed'])
+    game_state = game['game_state']
+
+    for round_idx, round_log in enumerate(game_log['game_history']):
+        # Dice are rolled before the first move of the round, so a mismatch here means the seeding changed
+        if game['current_hands'].tolist() != round_log['face_counts']:
+            return [f"Round {round_idx} dice {game['current_hands'].tolist()} do not match log {round_log['face_counts']}"]
+
+        # Every bid in the history is a bot response, including a bad bid that ended the round
+        for bid_count, bid_face, bot_index in round_log['bid_history']:
+            if game_state['bot_index'] != bot_index:
+                return [f"Round {round_idx} expected bot {bot_index} to bid but it is bot {game_state['bot_index']}'s turn"]
+            if verbose:
+                print(f"Round {round_idx}: bot {bot_index} bids {bid_count} {bid_face}s")
+            game_engine.handleResponse(game, {'response_type': 'bid', 'bid': [bid_count, bid_face]}, 0.0)
+            game_state = game['game_state']
+
+        # Rounds that did not end on a bad bid end on the calling player's response
+        result = round_log['result']
+        if game_state['round_count'] == round_idx:
+            if game_state['bot_index'] != round_log['calling_player']:
+                return [f"Round {round_idx} expected bot {round_log['calling_player']} to end the round but it is bot {game_state['bot_index']}'s turn"]
+            if verbose:
+                print(f"Round {round_idx}: bot {game_state['bot_index']} {result}")
+            if result in ['good_call', 'bad_call']:
+                game_engine.handleResponse(game, {'response_type': 'call'}, 0.0)
+            elif result == 'error_timeout':
+                game_engine.handleTimeout(game, 0.0)
+            else:
+                game_engine.handleResponse(game, None, 0.0)
+            game_state = game['game_state']
+
+        replayed_round = game_state['round_history'][-1]
+        for key in ['result', 'losing_player', 'calling_player']:
+            if replayed_round[key] != round_log[key]:
+                return [f"Round {round_idx} {key} replayed as {replayed_round[key]} but log has {round_log[key]}"]
+
+    if not game_engine.isGameOver(game):
+        return [f"Game is not over after {len(game_log['game_history'])} rounds"]
+    replayed_log = game_engine.buildGameLog(game)
+    if replayed_log['bot_rankings'] != game_log['bot_rankings']:
+        return [f"Rankings replayed as {replayed_log['bot_rankings']} but log has {game_log['bot_rankings']}"]
+    return []
+
+def checkSeating(game_log, planned_tables):
+    # Tables are planned up front from the tourney seed
+    seating = planned_tables[game_log['game_seed']]
+    if seating != game_log['bot_uuids']:
+        return [f"Seating replayed as {seating} but log has {game_log['bot_uuids']}"]
+    return []
+
+def replayTourney():
+    tourney_log = json.load(open(args.tourney_path))
+    if 'tourney_seed' not in tourney_log:
+        print(f"ERROR: Tourney {tourney_log['tourney_uuid']} was played before seeds were logged and can't be replayed")
+        sys.exit(1)
+
+    # Game seeds are the first draws from the tourney seed
+    game_count = tourney_log['tourney_game_count']
+    tourney_game_seeds = set(game_engine.tourneyGameSeeds(tourney_log['tourney_seed'], game_count))
+    server_config = {'player_count': tourney_log['player_count'], 'games_per_tourney_per_bot': tourney_log['games_per_bot']}
+    planned_tables = {game_seed: table for table, game_seed in game_engine.planTourneyGames(tourney_log['bot_uuids'], server_config, tourney_log['tourney_seed'])}
+    game_uuids = tourney_log['game_uuids']
+    if args.game_uuids is not None:
+        game_uuids = [foo for foo in game_uuids if foo in args.game_uuids]
+    # Game logs sit next to the tourney logs in json/games/<tourney_uuid>/
+    log_path = Path(args.tourney_path).parent.parent.parent
+    game_logs = [json.load(open(game_engine.gameLogPath(log_path, tourney_log['tourney_uuid'], game_uuid))) for game_uuid in game_uuids]
+
+    failed_games = 0
+    for game_log in game_logs:
+        if game_log['game_seed'] not in tourney_game_seeds:
+            problems = [f"Game seed {game_log['game_seed']} is not one of the tourney's game seeds"]
+        else:
+            problems = checkSeating(game_log, planned_tables) + replayGame(game_log, args.verbose)
+        if len(problems) > 0:
+            failed_games += 1
+            print(f"MISMATCH {game_log['game_uuid']}")
+            for problem in problems:
+                print(f"    {problem}")
+        elif args.verbose:
+            print(f"OK {game_log['game_uuid']}")
+
+    print(f"Replayed {len(game_logs)} of {game_count} games from tourney {tourney_log['tourney_index']} (seed {tourney_log['tourney_seed']}), {failed_games} mismatched")
+    if failed_games > 0:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    replayTourney()
@@ -3,16 +3,25 @@ import argparse
 import json
 import zmq
 import threading
+from collections import deque
 from multiprocessing import Process, Queue, Manager
 import time
 import uuid
 import numpy as np
 import os
+import sys
 from pathlib import Path
-import random
-from copy import deepcopy
+import queue
+import heapq
+import tempfile
 
 import process_logs # Load log processor to run as independent thread
+import game_engine
+import leaderboard
+
+# Wire format helpers are shared with the client
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'client'))
+import protocol
 
 parser = argparse.ArgumentParser()
 parser.add_argument("zmq_address", help="Address to start ZMQ on")
@@ -20,13 +29,27 @@ parser.add_argument("config_path", help="Path to server config to use")
 parser.add_argument("-d", "--debug_info", default=False, help="Print debug info about games")
 args = parser.parse_args()
 
-DEBUG_INFO = args.debug_info
+game_engine.DEBUG_INFO = args.debug_info
 
 timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 print(timestamp)
 
 # Load server configuration
 server_config = json.load(open(args.config_path))
+# One engine per core unless the config says otherwise
+if server_config['engine_pool_size'] is None:
+    server_config['engine_pool_size'] = os.cpu_count()
+
+# Max messages to pull off one socket before checking the other
+FORWARD_BATCH_SIZE = 1000
+# How often the router stops forwarding to check on engines and register bots
+HOUSEKEEPING_PERIOD_S = 1.0
+# How much each game's ping averages move a bot's latency estimate
+LATENCY_SMOOTHING = 0.2
+# Most games an engine picks up from the task queue at once, so a burst of games spreads over the pool instead of all going to whichever engine wakes first
+ENGINE_PULL_BATCH = 16
+# Games a bot starts a tourney with per move it can work on at once, it's only up for a move in some of its games
+GAMES_PER_MOVE_SLOT = 2
 
 def botRegistration(clients, id, data, broadcast_socket = None):
     # If new connection, add
@@ -35,7 +58,10 @@ def botRegistration(clients, id, data, broadcast_socket = None):
         print(f"New connection: {id} : {msg_data['full_title']}")
         clients[id] = {
             'metadata': msg_data,
-            'last_ping': time.time()
+            'last_ping': time.time(),
+            'move_capacity': protocol.negotiated_options(msg_data)['max_concurrent_moves'],
+            'moves_out': set(), # Game uuids the bot is working on a move for
+            'move_queue': deque(), # [game uuid, game state] waiting for the bot to have room
         }
 
         # Broadcast bot registration if requested
@@ -44,263 +70,337 @@ def botRegistration(clients, id, data, broadcast_socket = None):
                 b'RegisterBot',
                 json.dumps(msg_data).encode('utf-8')
             ])
-    # Otherwise track ping
+    # Otherwise track ping, bots can also change how many moves they take at once by registering again
     else:
         clients[id]['last_ping'] = time.time()
+        clients[id]['move_capacity'] = protocol.negotiated_options(json.loads(data))['max_concurrent_moves']
 
-def rollNewDice(game_state):
-    player_count = game_state['player_count']
-    new_hands = [[0] * 6 for _ in range(player_count)] # Nested list of zeros
-    for botIdx in range(player_count):
-        for i in range(game_state['dice_counts'][botIdx]):
-            new_hands[botIdx][np.random.randint(0, 6)] += 1
-    return new_hands
-
-def goToLegalPlayer(game_state):
-    nextPlayer = game_state['bot_index']
-    for i in range(game_state["player_count"]*2): # Loop through twice as to never hang
-        if nextPlayer >= game_state["player_count"]:
-            nextPlayer -= game_state["player_count"]
-
-        if game_state["dice_counts"][nextPlayer] > 0:
-            break
-
-        nextPlayer += 1
-
-        if nextPlayer == game_state['bot_index']:
-            print(f"FATAL ERROR All players have no dice \n{game_state['dice_counts']}\n\n{json.dumps(game_state, indent=4)}")
-            exit()
-    game_state['bot_index'] = nextPlayer
-    return game_state
-
-
-def endRound(result, game_state, face_counts, losing_player, calling_player):
-    global DEBUG_INFO
-    if DEBUG_INFO:
-        print(f"\nROUND END: {losing_player} {result} {face_counts}")
-        print(f"dice_counts: {game_state['dice_counts']}")
-        for foo in game_state['bid_history']:
-            print(foo)
-
-    # Losing player loses a die but goes first next round
-    game_state["dice_counts"][losing_player] -= 1
-
-    # Record if any player went out
-    if game_state["dice_counts"][losing_player] == 0:
-        game_state["bot_rankings"].append(losing_player)
-
-    # Get who starts next round (assuming players are out) this 
-    game_state = goToLegalPlayer(game_state)
-
-    # Reset ones being wild
-    game_state["wild_ones"] = True
-    game_state["first_round"] = True
-
-    # Save current round data as history
-    round_history = {
-        "losing_player": losing_player,
-        "calling_player": calling_player,
-        "result": result,
-        "bid_history": game_state['bid_history'],
-        "face_counts": face_counts,
-    }
-    game_state["round_history"].append(round_history)
-    game_state["bid"] = [0, 6]
-    game_state["bid_history"] = []
-    game_state["round_count"] += 1
-
-    return game_state, rollNewDice(game_state)
-
-def GameEngineProcess(dice_count, do_drop_wilds, player_uuids, tourney_uuid, timeout_Ms, game_engine_port, server_config):
-    # Init game state
-    start_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    start_time = time.time()
-    player_count = len(player_uuids)
-    game_uuid = str(uuid.uuid4())
-    game_state =  {
-        "bid": [0, 6], # Any raise will be a legal bid
-
-        "player_count": len(player_uuids),
-        "dice": [0, 0, 0, 0, 0, 0], # Updated on message send
-        "dice_counts": [dice_count for _ in range(player_count)],
-        "bot_index": 0,
-        "wild_ones": True,
-        "first_round": True,
-        
-        "bid_history": [],
-        "round_count": 0,
-
-        "round_history": [],
-        "bot_rankings": [],
-
-        "game_uuid": game_uuid
+def updateLatency(clients, game_result):
+    # Smoothed average response time for every bot in the game, bots that never got to move are left alone
+    for bot_uuid, ping_mS in zip(game_result['bot_uuids'], game_result['ping_averages_mS']):
+        client = clients.get(bot_uuid.encode('utf-8'))
+        if client is None or ping_mS <= 0:
+            continue
+        if 'latency_mS' not in client:
+            client['latency_mS'] = ping_mS
+        else:
+            client['latency_mS'] += LATENCY_SMOOTHING * (ping_mS - client['latency_mS'])
+
+def orderGames(game_tables, clients):
+    # Longest games first, moves go around the table so a game takes about as long as the sum of its bots' response times
+    # Bots without a latency yet are assumed to be as slow as the slowest known bot, ties keep the matchmaker's order
+    known_latencies = [foo['latency_mS'] for foo in clients.values() if 'latency_mS' in foo]
+    default_latency_mS = max(known_latencies, default=0.0)
+    game_times = [sum(clients[foo].get('latency_mS', default_latency_mS) for foo in game_bot_uuids) for game_bot_uuids, _ in game_tables]
+    return [game_tables[idx] for idx in sorted(range(len(game_tables)), key=lambda idx: -game_times[idx])]
+
+def botGameLimits(clients, max_games_per_bot):
+    # Games each bot starts the tourney with, bots that said how many moves they can work on at once get enough to keep that many busy
+    # After the first games start the limit is max_games_per_bot and bots only get more games while the router isn't holding moves for them
+    return {
+        bot_uuid: max_games_per_bot if client['move_capacity'] is None else min(max_games_per_bot, GAMES_PER_MOVE_SLOT*client['move_capacity'])
+        for bot_uuid, client in clients.items()
     }
 
-    ping_times = [[] for _ in range(len(player_uuids))]
+def launchGames(pending_games, games_in_flight, bot_games_in_flight, task_queue, bot_game_limits, clients):
+    # Queue waiting games in order, skipping any with a bot already at its in flight limit or behind on moves
+    idx = 0
+    while idx < len(pending_games):
+        game_task, game_bot_uuids, game_seed = pending_games[idx]
+        if any(bot_games_in_flight.get(foo, 0) >= bot_game_limits[foo] or clients[foo]['move_queue'] for foo in game_bot_uuids):
+            idx += 1
+            continue
+        for fooUuid in game_bot_uuids:
+            bot_games_in_flight[fooUuid] = bot_games_in_flight.get(fooUuid, 0) + 1
+        games_in_flight[game_seed] = game_bot_uuids
+        task_queue.put(game_task)
+        del pending_games[idx]
+
+def finishGame(games_in_flight, bot_games_in_flight, game_seed):
+    # Games are tracked by seed since the router never sees a game uuid before an engine picks the game up
+    for fooUuid in games_in_flight.pop(game_seed, []):
+        bot_games_in_flight[fooUuid] -= 1
+
+def sendGameOver(bot_socket, clients, game_uuid, bot_uuids, bot_rankings):
+    # Tell every bot in the game that asked for it that the game is done, so it can free anything it kept for it
+    for bot_index, bot_uuid in enumerate(bot_uuids):
+        client = clients.get(bot_uuid)
+        if client is None or not protocol.negotiated_options(client['metadata'])['game_over']:
+            continue
+        summary = protocol.game_over_summary(game_uuid.decode(), bot_index, len(bot_uuids), bot_rankings)
+        bot_socket.send_multipart([bot_uuid, b'', b'GameOver', game_uuid, json.dumps(summary).encode('utf-8')])
+
+def sendGameState(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, bot_uuid, game_uuid, move_seq, game_state):
+    # Bots that said how many moves they can work on at once only get that many, the rest wait here
+    # The engine is told when a move is held so time spent waiting doesn't count against the bot
+    # Every frame about a move carries the engine's move sequence number so frames about an older move of the same game get dropped
+    client = clients.get(bot_uuid)
+    if client is None or client['move_capacity'] is None:
+        outstanding_moves[game_uuid] = [bot_uuid, move_seq]
+        bot_socket.send_multipart([bot_uuid, b'', b'GameState', game_uuid, game_state])
+    elif len(client['moves_out']) < client['move_capacity']:
+        client['moves_out'].add(game_uuid)
+        outstanding_moves[game_uuid] = [bot_uuid, move_seq]
+        bot_socket.send_multipart([bot_uuid, b'', b'GameState', game_uuid, game_state])
+    else:
+        client['move_queue'].append([game_uuid, move_seq, game_state])
+        gameEngine_socket.send_multipart([engine_routes[game_uuid], b'', b'MoveQueued', game_uuid, move_seq])
+
+def moveTimedOut(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, bot_uuid, game_uuid, move_seq):
+    # The engine gave up on this move, forget it whether it was sent to the bot or still held here
+    if outstanding_moves.get(game_uuid) == [bot_uuid, move_seq]:
+        del outstanding_moves[game_uuid]
+    client = clients.get(bot_uuid)
+    if client is not None and client['move_queue']:
+        client['move_queue'] = deque(foo for foo in client['move_queue'] if foo[:2] != [game_uuid, move_seq])
+    freeMoveSlot(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, bot_uuid, game_uuid)
+
+def freeMoveSlot(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, bot_uuid, game_uuid):
+    # Bot answered or ran out of time, hand it the next held game state and start that move's clock
+    client = clients.get(bot_uuid)
+    if client is None or game_uuid not in client['moves_out']:
+        return
+    client['moves_out'].discard(game_uuid)
+    dispatchQueuedMoves(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, bot_uuid)
+
+def dispatchQueuedMoves(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, bot_uuid):
+    # Send held game states while the bot has room and start each move's clock
+    # A bot that registers again without a capacity gets everything that was held for it
+    client = clients[bot_uuid]
+    while client['move_queue'] and (client['move_capacity'] is None or len(client['moves_out']) < client['move_capacity']):
+        next_game_uuid, move_seq, game_state = client['move_queue'].popleft()
+        engine_id = engine_routes.get(next_game_uuid)
+        if engine_id is None:
+            continue
+        client['moves_out'].add(next_game_uuid)
+        outstanding_moves[next_game_uuid] = [bot_uuid, move_seq]
+        bot_socket.send_multipart([bot_uuid, b'', b'GameState', next_game_uuid, game_state])
+        gameEngine_socket.send_multipart([engine_id, b'', b'MoveDispatched', next_game_uuid, move_seq])
+
+def sendMoveRequest(gameEngine_socket, game, deadlines, timeout_Ms):
+    # Send game state to the bot that is up and start its move clock
+    bot_uuid, game_state = game_engine.moveRequest(game)
+
+    # Bots that asked for deltas only get what changed since their last request in this game
+    bot_index = game_state['bot_index']
+    if game['player_protocols'][bot_index]['delta_state']:
+        last_sent = game['delta_sent'][bot_index]
+        game['delta_sent'][bot_index] = [game_state['round_count'], len(game_state['bid_history'])]
+        game['delta_base'] = last_sent # What the bot is known to have if this move never reaches it
+        game_state = protocol.make_delta_state(game_state, last_sent)
+
+    game['move_seq'] += 1
+    gameEngine_socket.send_multipart([
+        b'', 
+        b'MoveRequest',
+        game['tourney_uuid_bytes'],
+        bot_uuid,
+        game['game_uuid_bytes'],
+        str(game['move_seq']).encode('utf-8'),
+        protocol.encode_game_state(game_state, game['player_protocols'][bot_index]['encoding'])
+    ])
+    game['move_sent_time'] = time.time()
+    game['move_deadline'] = game['move_sent_time'] + timeout_Ms/1000
+    heapq.heappush(deadlines, (game['move_deadline'], game['game_uuid_bytes']))
+
+def advanceGame(gameEngine_socket, games, game, deadlines, timeout_Ms, server_config):
+    # Either finish the game or ask the next bot for a move
+    if game_engine.isGameOver(game):
+        del games[game['game_uuid_bytes']]
+        # The router only reads the small result, the full log is passed on as is
+        game_log = game_engine.buildGameLog(game)
+        game_result = game_engine.gameResult(game_log) | {'game_seed': game_log['game_seed'], 'ping_averages_mS': game_log['ping_averages_mS']}
+        gameEngine_socket.send_multipart([
+            b'', 
+            b'GameLog',
+            game['tourney_uuid_bytes'],
+            json.dumps(game_result).encode('utf-8'),
+            json.dumps(game_log).encode('utf-8')
+        ])
+    # Timeout if exceeded tourney timeout
+    elif game_engine.isGameTimedOut(game, server_config['game_timeout_mS']):
+        print(f"CRITICAL: GAME ENGINE EXCEEDED TIMEOUT. Game state:{game['game_state']}")
+        del games[game['game_uuid_bytes']]
+        gameEngine_socket.send_multipart([
+            b'', 
+            b'GameTimeout',
+            game['tourney_uuid_bytes'],
+            game['game_uuid_bytes'],
+            str(game['game_seed']).encode('utf-8')
+        ])
+    else:
+        sendMoveRequest(gameEngine_socket, game, deadlines, timeout_Ms)
 
-    current_hands = None
-    
-    # Init socket connection - create new context for this process
-    game_context = zmq.Context()
+def GameEngineProcess(task_queue, engine_connect_address, server_config, stop_event=None):
+    # Long lived engine worker, runs up to games_per_engine games at once pulled from the task queue
+    # Every game is a state machine that advances when its bot's move arrives or its move deadline passes
+    # Init socket connection once, engine threads share the server's context so inproc works
+    game_context = zmq.Context.instance()
     gameEngine_socket = game_context.socket(zmq.DEALER)
-    gameEngine_socket.connect(f"tcp://localhost:{game_engine_port}")
-    gameEngine_socket.setsockopt_string(zmq.IDENTITY, game_uuid)
+    gameEngine_socket.setsockopt_string(zmq.IDENTITY, str(uuid.uuid4()))
+    gameEngine_socket.connect(engine_connect_address)
 
     poller = zmq.Poller()
     poller.register(gameEngine_socket, zmq.POLLIN)
-    
-    while True:
-        # Roll new dice (on start and on new round)
-        if current_hands == None:
-            current_hands = rollNewDice(game_state)
-
-        # Update current dice counts in state
-        game_state['dice'] = current_hands[game_state['bot_index']]
-
-        # Send game state to bot
-        gameEngine_socket.send_multipart([
-            b'', 
-            b'MoveRequest',
-            player_uuids[game_state['bot_index']],
-            json.dumps(game_state).encode('utf-8')
-        ])
-
-        # Ease of reference var
-        bot_index = game_state['bot_index']
 
-        # Get response and ping time
-        response_ping = time.time()
-        socks = dict(poller.poll(timeout_Ms))
-        response_ping = time.time() - response_ping
-        ping_times[bot_index].append(response_ping)
+    timeout_Ms = server_config['move_timeout_mS']
+    max_games = server_config['games_per_engine']
+    games = {} # Live games by game uuid
+    deadlines = [] # Heap of (move deadline, game uuid), entries for moves that already came back are skipped
 
-        # Handle move
-        if gameEngine_socket in socks and socks[gameEngine_socket] == zmq.POLLIN:
-            _, response = gameEngine_socket.recv_multipart()
-            
-            # Set last bidder if not first bid
-            if len(game_state['bid_history']) > 0:
-                last_bidder = game_state['bid_history'][-1][2]
-            else:
-                last_bidder = bot_index
+    parent_pid = os.getppid()
+    while True:
+        # Engine threads can't be killed, so they check whether their pool was stopped instead
+        if stop_event is not None and stop_event.is_set():
+            break
 
-            # Sanitize response input
-            okayResponse = True
+        # Pick up new games while there is room, a batch at a time, only block when idle
+        games_pulled = 0
+        while len(games) < max_games and games_pulled < ENGINE_PULL_BATCH:
             try:
-                response = json.loads(response)
-                if 'response_type' not in response: okayResponse = False
-                elif response['response_type'] not in ['call', 'bid'] : okayResponse = False
-                elif response['response_type'] == 'bid':
-                    if 'bid' not in response: okayResponse = False
-                    elif response['bid'][0] <= 0: okayResponse = False
-                    elif response['bid'][1] > 6: okayResponse = False
-            except:
-                okayResponse = False
-
-            # Current bot loses if the response is bad
-            if not okayResponse:
-                game_state, current_hands = endRound("error_bad_response", game_state, current_hands, bot_index, bot_index)
-                gameEngine_socket.send_multipart([
-                    b'', 
-                    b'PrintToBot',
-                    player_uuids[game_state['bot_index']],
-                    f"Bad response: {json.dumps(response)}".encode('utf-8')
-                ])
-
-            # if call, calculate if it is correct
-            elif response['response_type'] == 'call':
-                dice_sums = np.sum(np.array(current_hands), axis=0)
-                
-                # Add ones if wild
-                if game_state['wild_ones']:
-                    dice_sums[1:] += dice_sums[0]
-                
-                bidRealValue = dice_sums[game_state['bid'][1]-1] # subtract 1 for zero indexing
-                # actually check if bid was legitimate
-                if bidRealValue >= game_state['bid'][0]:
-                    game_state, current_hands = endRound("bad_call", game_state, current_hands, bot_index, bot_index)
-                else:
-                    game_state, current_hands = endRound("good_call", game_state, current_hands, last_bidder, bot_index)
-
-            elif response['response_type'] == 'bid':
-                # Update wild ones status before we do anything else
-                if game_state["first_round"] and response['bid'][1] == 1 and do_drop_wilds:
-                    game_state["wild_ones"] = False
-                
-                # If bids have been place and current bot was first player, first round is over
-                if len(game_state["bid_history"]) > 0 and game_state["bid_history"][-1][2] == bot_index:
-                    game_state["first_round"] = False
-
-                # Append bot index to end of history
-                game_state['bid_history'].append([response['bid'][0], response['bid'][1], bot_index])
-                
-                # Count cannot ever decrease
-                if response['bid'][0] < game_state['bid'][0]:
-                    game_state, current_hands = endRound("error_lower_count", game_state, current_hands, bot_index, bot_index)
-
-                # If count is the same, face must increase
-                elif response['bid'][0] == game_state['bid'][0] and response['bid'][1] <= game_state['bid'][1]:
-                    game_state, current_hands = endRound("error_increase_face", game_state, current_hands, bot_index, bot_index)
-
-                # Cannot bid more dice than exist
-                elif response['bid'][0] > sum(game_state['dice_counts']):
-                    game_state, current_hands = endRound("error_overflow", game_state, current_hands, bot_index, bot_index)
-                
-                # Move was successful, update info and pass turn
+                # Wake up every second to check that the server is still alive so engines do not outlive it
+                if len(games) == 0:
+                    game_task = task_queue.get(timeout=1)
                 else:
-                    # Update bid
-                    game_state['bid'] = [response['bid'][0], response['bid'][1]]
-
-                    # Pass to next player
-                    game_state['bot_index'] += 1
-                    game_state = goToLegalPlayer(game_state)
-
-        # Handle bot timeout
-        elif len(socks) == 0:
-            game_state, current_hands = endRound("error_timeout", game_state, current_hands, bot_index, bot_index)
-
-        # Break if only one bot remains
-        if sum(game_state['dice_counts']) == max(game_state['dice_counts']):
-            break
-        
-        # Timeout if exceeded tourney timeout
-        if (time.time() - start_time)*1000 > server_config['game_timeout_mS']:
-            print(f"CRITICAL: GAME ENGINE EXCEEDED TIMEOUT. Game state:{game_state}")
-            return
-
-    # Add winner to rankings
-    game_state["bot_rankings"].append(game_state['bot_index'])
-    game_state["bot_rankings"].reverse() # Index 0 is winner and so on
-
-    # Build game log
-    game_log = {
-        "game_history": game_state['round_history'],
-        "bot_rankings": game_state["bot_rankings"],
-
-        "bot_count": len(player_uuids),
-        "dice_count": dice_count,
-        "wild_ones_drop": do_drop_wilds, 
-
-        "bot_uuids": [str(foo.decode()) for foo in player_uuids],
-        "game_uuid": game_uuid,
-        "tourney_uuid": tourney_uuid,
-
-        "start_time": start_timestamp,
-        "end_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        "ping_averages_mS": [1000*np.average(arr) if len(arr) > 0 else 0 for arr in ping_times],
-        "ping_maximums_mS": [1000*np.max(arr) if len(arr) > 0 else 0 for arr in ping_times]
-    }
-
-    # Send game log
-    gameEngine_socket.send_multipart([
-        b'', 
-        b'GameLog',
-        json.dumps(game_log).encode('utf-8')
-    ])
+                    game_task = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            games_pulled += 1
+            game_args, player_protocols = game_task
+            game = game_engine.newGame(*game_args)
+            game['game_uuid_bytes'] = game['game_uuid'].encode('utf-8')
+            game['tourney_uuid_bytes'] = game['tourney_uuid'].encode('utf-8')
+            game['player_protocols'] = player_protocols
+            game['delta_sent'] = [[0, 0] for _ in player_protocols]
+            game['move_seq'] = 0 # Counts move requests, frames about any other request than the latest are stale
+            games[game['game_uuid_bytes']] = game
+            sendMoveRequest(gameEngine_socket, game, deadlines, timeout_Ms)
+
+        if len(games) == 0:
+            if os.getppid() != parent_pid:
+                break
+            continue
 
-    return
+        # Sleep until a move shows up or the next move deadline passes, or just check for moves if there may be more games waiting
+        if games_pulled == ENGINE_PULL_BATCH:
+            poll_timeout = 0
+        else:
+            poll_timeout = max(0, int(1000*(deadlines[0][0] - time.time()))) if deadlines else 1000
+        socks = dict(poller.poll(poll_timeout))
+
+        # Handle every move that has arrived
+        if gameEngine_socket in socks:
+            while True:
+                try:
+                    _, messageType, message_game_uuid, message_seq, *message = gameEngine_socket.recv_multipart(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                # Frames that show up late for a game that already ended or a move that already timed out are dropped
+                game = games.get(message_game_uuid)
+                if game is None or game['move_deadline'] is None or int(message_seq) != game['move_seq']:
+                    continue
+                # Router is holding the game state until the bot has room, the move clock starts when it's sent
+                if messageType == b'MoveQueued':
+                    game['move_deadline'] = float('inf')
+                    continue
+                elif messageType == b'MoveDispatched':
+                    game['move_sent_time'] = time.time()
+                    game['move_deadline'] = game['move_sent_time'] + timeout_Ms/1000
+                    heapq.heappush(deadlines, (game['move_deadline'], game['game_uuid_bytes']))
+                    continue
+                elif messageType != b'Move':
+                    continue
+                bot_index = game['game_state']['bot_index']
+                message = message[0]
+                if game['player_protocols'][bot_index]['encoding'] != 'json':
+                    message = protocol.decode_move(message)
+                bot_message = game_engine.handleResponse(game, message, time.time() - game['move_sent_time'])
+                game['move_deadline'] = None
+                if bot_message is not None:
+                    gameEngine_socket.send_multipart([
+                        b'', 
+                        b'PrintToBot',
+                        game['player_uuids'][bot_index],
+                        bot_message.encode('utf-8')
+                    ])
+                advanceGame(gameEngine_socket, games, game, deadlines, timeout_Ms, server_config)
+
+        # Handle bot timeouts
+        now = time.time()
+        while deadlines and deadlines[0][0] <= now:
+            deadline, game_uuid = heapq.heappop(deadlines)
+            game = games.get(game_uuid)
+            if game is None or game['move_deadline'] != deadline:
+                continue
+            # Let the router know the bot is free, then move on without it
+            gameEngine_socket.send_multipart([
+                b'', 
+                b'MoveTimedOut',
+                game['player_uuids'][game['game_state']['bot_index']],
+                game_uuid,
+                str(game['move_seq']).encode('utf-8')
+            ])
+            # The router drops the state if it was still holding it, so the bot's next delta goes back to what it's known to have
+            bot_index = game['game_state']['bot_index']
+            if game['player_protocols'][bot_index]['delta_state']:
+                game['delta_sent'][bot_index] = game['delta_base']
+            game_engine.handleTimeout(game, now - game['move_sent_time'])
+            game['move_deadline'] = None
+            advanceGame(gameEngine_socket, games, game, deadlines, timeout_Ms, server_config)
+
+    gameEngine_socket.close()
+
+def engineAddresses(server_config):
+    # Addresses for the router to bind and engines to connect to for the configured transport
+    # inproc skips the kernel entirely but only works when engines are threads in the server process
+    transport = server_config['engine_transport']
+    if transport == 'tcp':
+        game_engine_port = server_config['game_port'] + 1000  # Use a different port for internal communication
+        return f"tcp://*:{game_engine_port}", f"tcp://localhost:{game_engine_port}"
+    elif transport == 'ipc':
+        ipc_path = os.path.join(tempfile.gettempdir(), f"liars_dice_engines_{server_config['game_port']}")
+        return f"ipc://{ipc_path}", f"ipc://{ipc_path}"
+    elif transport == 'inproc':
+        return "inproc://game_engines", "inproc://game_engines"
+    else:
+        raise ValueError(f"Engine transport {transport} does not exist, use tcp, ipc or inproc")
+
+def startEnginePool(engine_connect_address, server_config):
+    # Kick off persistent game engines that pull games from a shared queue
+    # With inproc engines are threads in this process, otherwise they are processes
+    # Returns the task queue, the engines and the event that stops engine threads
+    use_threads = server_config['engine_transport'] == 'inproc'
+    task_queue = queue.Queue() if use_threads else Queue()
+    stop_event = threading.Event() if use_threads else None
+    engine_processes = []
+    for i in range(server_config['engine_pool_size']):
+        p = (threading.Thread if use_threads else Process)(
+            target=GameEngineProcess, 
+            args=[task_queue, engine_connect_address, server_config, stop_event],
+            name=f"GameEngine_{i}",
+            daemon=True
+        )
+        p.start()
+        engine_processes.append(p)
+    return task_queue, engine_processes, stop_event
+
+def stopEnginePool(engine_processes, stop_event):
+    # Engine threads drop their games and exit on their next loop, processes are terminated
+    if stop_event is not None:
+        stop_event.set()
+    for p in engine_processes:
+        if not isinstance(p, Process):
+            p.join(timeout=5)
+            if p.is_alive():
+                print(f"WARNING: Engine thread {p.name} did not stop")
+            continue
+        if p.is_alive():
+            p.terminate()
+            p.join(timeout=5)
+            if p.is_alive():
+                p.kill()
 
-def tourneyLogsThread(context, server_config):
+def tourneyLogsThread(context, server_config, log_queues):
     # Init receiving communications for logs
     log_socket = context.socket(zmq.SUB)
     log_socket_path = f"tcp://localhost:{server_config['logs_port']}"
@@ -313,6 +413,7 @@ def tourneyLogsThread(context, server_config):
     log_path = Path(server_config['logs_path'])
     os.makedirs(log_path / "json" / "clients", exist_ok=True)
     os.makedirs(log_path / "json" / "tournies", exist_ok=True)
+    os.makedirs(log_path / "json" / "games", exist_ok=True)
     
     while True:
         socks = dict(poller.poll(100)) # 100ms timeout so we will start tournament even if every bot is connected
@@ -329,15 +430,19 @@ def tourneyLogsThread(context, server_config):
 
             if messageType == b'RegisterBot':
                 msg_data = json.loads(messageData[0])
-                json.dump(msg_data, open(log_path / "json" / "clients" / f"{msg_data['session_uuid']}.json", 'w'), indent='\t')
+                file_path = log_path / "json" / "clients" / f"{msg_data['session_uuid']}.json"
+                game_engine.writeLogFile(file_path, json.dumps(msg_data, indent='\t').encode('utf-8'))
+                log_queues['clients'].put(str(file_path))
             elif messageType == b'TourneyLog':
                 msg_data = json.loads(messageData[0])
-                json.dump(msg_data, open(log_path / "json" / "tournies" / f"{str(msg_data['tourney_index']).rjust(8, '0')}_{msg_data['tourney_uuid']}.json", 'w'), indent='\t')
+                file_path = log_path / "json" / "tournies" / f"{str(msg_data['tourney_index']).rjust(8, '0')}_{msg_data['tourney_uuid']}.json"
+                game_engine.writeLogFile(file_path, json.dumps(msg_data, indent='\t').encode('utf-8'))
+                # Hand the finished file straight to the ingestor, its game logs were all written before it
+                log_queues['tournies'].put(str(file_path))
             elif messageType == b'GameLog':
-                # We are only logging tourney logs now
-                pass
-                # msg_data = json.loads(messageData[0])
-                # json.dump(msg_data, open(log_path / "json" / "games" / f"{msg_data['tourney_uuid']}_{msg_data['game_uuid']}.json", 'w'), indent='\t')
+                # Games are written as they finish so the tourney log only has to carry the summary
+                game_log, game_tourney_uuid, game_uuid = messageData
+                game_engine.writeGameLog(log_path, game_tourney_uuid.decode(), game_uuid.decode(), game_log)
             else:
                 print(f"Invalid message type received on log_socket: {messageType}")
                 continue
@@ -359,34 +464,44 @@ def runServer(server_config):
     broadcast_socket = context.socket(zmq.PUB)
     broadcast_socket.bind(f"tcp://*:{server_config['logs_port']}")
 
-    # Init internal game communication - use TCP for multiprocessing
-    game_engine_port = server_config['game_port'] + 1000  # Use a different port for internal communication
+    # Init internal game communication over the configured transport
+    engine_bind_address, engine_connect_address = engineAddresses(server_config)
     gameEngine_socket = context.socket(zmq.ROUTER)
-    gameEngine_socket.bind(f"tcp://*:{game_engine_port}")
+    gameEngine_socket.bind(engine_bind_address)
 
     # Poller to handle both network comms and game comms
     poller = zmq.Poller()
     poller.register(bot_socket, zmq.POLLIN)
     poller.register(gameEngine_socket, zmq.POLLIN)
 
+    # Kick off log ingestor, it gets told about every json the logger writes
+    print(f"Starting log ingestor")
+    log_queues = process_logs.log_ingestor_threads(Path(server_config['logs_path']), database_path=server_config['log_database'])
+
     # Kick off logger thread
     print(f"Starting log broadcaster")
     log_broadcaster = threading.Thread(
                 target=tourneyLogsThread, 
-                args=[context, server_config],
+                args=[context, server_config, log_queues],
                 name=f"log_broadcaster",
                 daemon=True
             )
     log_broadcaster.start()
-    
-    print(f"Starting log ingestor")
-    log_ingestor = threading.Thread(
-                target=process_logs.log_ingestor_threads(), 
-                args=["fjaksdlfjskadlf"],
-                name=f"log_ingestor",
-                daemon=True,
-            )
-    log_ingestor.start()
+
+    # Kick off leaderboard, it follows the same broadcast as everyone else
+    if server_config['leaderboard_port'] is not None:
+        print(f"Starting leaderboard")
+        leaderboard_thread = threading.Thread(
+                    target=leaderboard.runLeaderboard, 
+                    args=[f"localhost:{server_config['logs_port']}", server_config['leaderboard_port'], server_config['logs_path'], context],
+                    name=f"leaderboard",
+                    daemon=True
+                )
+        leaderboard_thread.start()
+
+    # Kick off game engine pool once, engines are reused across tourneys
+    print(f"Starting {server_config['engine_pool_size']} game engines")
+    task_queue, engine_processes, engine_stop_event = startEnginePool(engine_connect_address, server_config)
 
     # List of clients that are active
     clients = {}
@@ -458,140 +573,185 @@ def runServer(server_config):
         tourney_idx += 1
         tourney_client_uuids = list(clients.keys())
         tourney_uuid = str(uuid.uuid4())
+        tourney_uuid_bytes = tourney_uuid.encode('utf-8')
+        tourney_seed = game_engine.tourneySeed(server_config['tourney_seed'], tourney_idx)
         tourney_start_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print(f"\n\nStarting tourney {tourney_idx} with {len(clients)} bots")
+        print(f"\n\nStarting tourney {tourney_idx} with {len(clients)} bots (seed {tourney_seed})")
 
         
-        # Kick off game engines
-        game_processes = []
-        game_logs = []
-        # Calculate how many games to start
-        game_sizes = server_config['player_count']
-        min_players = game_sizes[0]
-        max_players = max(game_sizes[0], game_sizes[1])
-        players_per_game = np.average(np.array(np.arange(min_players, max_players+1), dtype=np.float16))
-        game_count = int(np.ceil(server_config['games_per_tourney_per_bot'] * len(clients) / players_per_game))
-        print(f"Kicking off {game_count} games")
+        # Replace any engines that died since the last tourney
+        if not all(p.is_alive() for p in engine_processes):
+            print(f"WARNING: Restarting game engine pool")
+            stopEnginePool(engine_processes, engine_stop_event)
+            task_queue, engine_processes, engine_stop_event = startEnginePool(engine_connect_address, server_config)
+
+        # Queue games for the engine pool
+        game_results = [] # Only what scoring needs, the engines' full logs go straight to the log writer
+        games_finished = 0
+        engine_routes = {} # Which engine is running each game, by game uuid
+        outstanding_moves = {} # [bot uuid, move sequence] of the move each game is waiting on, by game uuid, once it's sent to the bot
+        for client in clients.values():
+            client['moves_out'].clear()
+            client['move_queue'].clear()
+        # Pick the tables for every game
         bot_uuids = list(clients.keys())
-        game_processes_live = game_count
-        for i in range(game_count):
-            # Get new set of bots
-            nextGameCount = random.randint(server_config['player_count'][0], min(len(clients), server_config['player_count'][1]))
-            game_bot_uuids = random.sample(bot_uuids, nextGameCount)
-            game_bot_uuids = deepcopy(game_bot_uuids)
-            random.shuffle(game_bot_uuids)
-            p = Process(
-                target=GameEngineProcess, 
-                args=[server_config['dice_count'], server_config['do_drop_wilds'], game_bot_uuids, tourney_uuid, server_config['move_timeout_mS'], game_engine_port, server_config],
-                name=f"GameEngine_{i}",
-                daemon=True
-            )
-            p.start()
-            game_processes.append(p)
+        game_tables = game_engine.planTourneyGames(bot_uuids, server_config, tourney_seed)
+        game_count = len(game_tables)
+        print(f"Kicking off {game_count} games")
+        # Games are handed to the engines slowest first, and only while each of their bots has room for another game
+        pending_games = []
+        for game_bot_uuids, game_seed in orderGames(game_tables, clients):
+            player_protocols = [protocol.negotiated_options(clients[fooUuid]['metadata']) for fooUuid in game_bot_uuids]
+            pending_games.append([
+                [[server_config['dice_count'], server_config['do_drop_wilds'], game_bot_uuids, tourney_uuid, game_seed], player_protocols],
+                game_bot_uuids,
+                game_seed
+            ])
+        games_in_flight = {} # Bot uuids of every queued or running game by game seed
+        bot_games_in_flight = {} # Queued or running game count by bot uuid
+        bot_game_limits = botGameLimits(clients, server_config['max_games_in_flight_per_bot'])
+        launchGames(pending_games, games_in_flight, bot_games_in_flight, task_queue, bot_game_limits, clients)
+        bot_game_limits = dict.fromkeys(clients, server_config['max_games_in_flight_per_bot'])
+        games_launched = len(games_in_flight) # In flight count after the last launch, anything less means games finished since
 
         # Handle re-routing ZMQ messages to engines
         # Wait for all games to return or hang
-        while game_processes_live > 0:
-            socks = dict(poller.poll(100)) # 100ms timeout so we will start tournament even if every bot is connected
+        # Both sockets are drained in batches without blocking, anything that isn't a move is left for housekeeping
+        tourney_aborted = False
+        last_engine_message_time = time.time()
+        last_housekeeping_time = time.time()
+        pending_registrations = []
+        while games_finished < game_count:
+            socks = dict(poller.poll(100)) # 100ms timeout so we still do housekeeping when nothing is happening
 
-            # Timeout hit, check to make sure all games processes are still live
-            if len(socks) == 0:
-                # Check for live game processes
-                game_processes_live = 0
-                for p in game_processes:
-                    if p.is_alive():
-                        game_processes_live += 1
-                if game_processes_live == 0:
-                    print("WARNING All game processes returned without full logs")
-                    # We timed out despite all games having returned. This should not happen
-                    break
-                else:
-                    print(f"{game_processes_live} live processes")
-            
             # Handle bot communication
-            elif bot_socket in socks and socks[bot_socket] == zmq.POLLIN:                    
-                messageIdentity, _, messageType, *messageData = bot_socket.recv_multipart()
-                
-                # Verify that message is legitimate bot metadata
-                if messageType == b'RegisterBot':
-                    botRegistration(clients, messageIdentity, messageData[0], broadcast_socket)
-                # Handle move response
-                elif messageType == b'Move':
-                    # Move data is [game_uuid, move_json] so pass those directly to game engines
-                    gameEngine_socket.send_multipart([messageData[0], b'', messageData[1]])
-                else:
-                    print(f"Invalid message type received on gameEngine_socket: {messageType}")
-                    continue
-            
-            # Handle engine communication
-            elif gameEngine_socket in socks and socks[gameEngine_socket] == zmq.POLLIN:
-                messageIdentity, _, messageType, *messageData = gameEngine_socket.recv_multipart()
-                
-                # Redirect move requests to the appropriate bot GUID
-                if messageType == b'MoveRequest':
-                    # Include messageIdentity to trace game
-                    bot_socket.send_multipart([messageData[0], b'', b'GameState', messageIdentity, messageData[1]])
-                
-                # Log game results
-                elif messageType == b'GameLog':
-                    game_logs.append(messageData[0])
-                    broadcast_socket.send_multipart([b'GameLog', messageData[0]])
-
-                elif messageType == b'PrintToBot':
-                    bot_socket.send_multipart([messageData[0], b'', b'Print', messageData[1]])
-                else:
-                    print(f"Invalid message type received on broadcast_socket: {messageType}")
-                    continue
+            if bot_socket in socks:
+                for _ in range(FORWARD_BATCH_SIZE):
+                    try:
+                        messageIdentity, _, messageType, *messageData = bot_socket.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+
+                    # Handle move response
+                    if messageType == b'Move':
+                        # Move data is [game_uuid, move_json] so pass those directly to the engine running that game
+                        # Bots only get to answer the move the game is waiting on from them, tagged with that move's sequence number
+                        outstanding = outstanding_moves.get(messageData[0])
+                        if outstanding is None or outstanding[0] != messageIdentity:
+                            continue
+                        del outstanding_moves[messageData[0]]
+                        engine_id = engine_routes.get(messageData[0])
+                        if engine_id is not None:
+                            gameEngine_socket.send_multipart([engine_id, b'', b'Move', messageData[0], outstanding[1], messageData[1]])
+                        freeMoveSlot(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, messageIdentity, messageData[0])
+                    # Verify that message is legitimate bot metadata
+                    elif messageType == b'RegisterBot':
+                        pending_registrations.append((messageIdentity, messageData[0]))
+                    else:
+                        print(f"Invalid message type received on bot_socket: {messageType}")
 
-            # Something is afoot
+            # Handle engine communication
+            if gameEngine_socket in socks:
+                last_engine_message_time = time.time()
+                for _ in range(FORWARD_BATCH_SIZE):
+                    try:
+                        messageIdentity, _, messageType, *messageData = gameEngine_socket.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+
+                    # Redirect move requests to the appropriate bot GUID
+                    if messageType == b'MoveRequest':
+                        # Move request is [tourney_uuid, bot_uuid, game_uuid, move_seq, game_state], remember which engine to send the response to
+                        # Games left over from an earlier tourney that was cut short are ignored
+                        if messageData[0] != tourney_uuid_bytes:
+                            continue
+                        engine_routes[messageData[2]] = messageIdentity
+                        sendGameState(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, *messageData[1:])
+
+                    # Bot ran out of time on a move, give its slot to the next game waiting on it
+                    elif messageType == b'MoveTimedOut':
+                        moveTimedOut(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, *messageData)
+
+                    # Log game results
+                    elif messageType == b'GameLog':
+                        # Game log is [tourney_uuid, game result, full game log], only the result is parsed here
+                        game_tourney_uuid, game_result, game_log = messageData
+                        if game_tourney_uuid != tourney_uuid_bytes:
+                            continue
+                        game_result = json.loads(game_result)
+                        game_uuid = game_result['game_uuid'].encode('utf-8')
+                        game_results.append(game_result)
+                        updateLatency(clients, game_result)
+                        sendGameOver(bot_socket, clients, game_uuid, [foo.encode('utf-8') for foo in game_result['bot_uuids']], game_result['bot_rankings'])
+                        finishGame(games_in_flight, bot_games_in_flight, game_result['game_seed'])
+                        outstanding_moves.pop(game_uuid, None)
+                        games_finished += 1
+                        # Uuids ride along so the log writer doesn't have to parse the log either
+                        broadcast_socket.send_multipart([b'GameLog', game_log, game_tourney_uuid, game_uuid])
+
+                    # Game hit the game timeout and returned without a log
+                    elif messageType == b'GameTimeout':
+                        game_tourney_uuid, game_uuid, game_seed = messageData
+                        if game_tourney_uuid != tourney_uuid_bytes:
+                            continue
+                        sendGameOver(bot_socket, clients, game_uuid, games_in_flight.get(int(game_seed), []), None)
+                        finishGame(games_in_flight, bot_games_in_flight, int(game_seed))
+                        outstanding_moves.pop(game_uuid, None)
+                        games_finished += 1
+
+                    elif messageType == b'PrintToBot':
+                        bot_socket.send_multipart([messageData[0], b'', b'Print', messageData[1]])
+                    else:
+                        print(f"Invalid message type received on gameEngine_socket: {messageType}")
+
+                # Finished games make room for waiting ones
+                if pending_games and len(games_in_flight) < games_launched:
+                    launchGames(pending_games, games_in_flight, bot_games_in_flight, task_queue, bot_game_limits, clients)
+                games_launched = len(games_in_flight)
+
+            # Housekeeping runs on a timer so it stays off the forwarding path
+            if time.time() - last_housekeeping_time < HOUSEKEEPING_PERIOD_S:
+                continue
+            last_housekeeping_time = time.time()
+
+            for messageIdentity, registryData in pending_registrations:
+                botRegistration(clients, messageIdentity, registryData, broadcast_socket)
+                # Capacity may have gone up or away
+                dispatchQueuedMoves(bot_socket, gameEngine_socket, clients, engine_routes, outstanding_moves, messageIdentity)
+            pending_registrations = []
+
+            # Bots that caught up on their moves can take more games
+            if pending_games:
+                launchGames(pending_games, games_in_flight, bot_games_in_flight, task_queue, bot_game_limits, clients)
+                games_launched = len(games_in_flight)
+
+            # Check to make sure the engines are still making progress
+            engines_live = sum(p.is_alive() for p in engine_processes)
+            if engines_live == 0:
+                print("WARNING All game engines died without full logs")
+                tourney_aborted = True
+                break
+            elif (time.time() - last_engine_message_time)*1000 > server_config['game_timeout_mS']:
+                print(f"WARNING No engine activity for {server_config['game_timeout_mS']} mS, {game_count - games_finished} games lost")
+                tourney_aborted = True
+                break
             else:
-                print(f"Failed to handle {socks}")
+                print(f"{game_count - games_finished} games remaining")
 
-            # Break if all games have returned
-            if len(game_logs) == game_count:
-                break
+        # Register any bots that showed up at the very end
+        for messageIdentity, registryData in pending_registrations:
+            botRegistration(clients, messageIdentity, registryData, broadcast_socket)
 
         print(f"Tourney complete")
         
-        # Clean up game processes
-        for p in game_processes:
-            if p.is_alive():
-                p.terminate()
-                p.join(timeout=5)
-                if p.is_alive():
-                    p.kill()
-
-        # Parse game logs
-        game_logs = [json.loads(log) for log in game_logs] # Load game logs as json
-        bot_uuid_str = [foo.decode() for foo in tourney_client_uuids]
-        
-        results_by_bot = {foo:[[], []] for foo in bot_uuid_str}
-        for log in game_logs:
-            for botIdx, fooUuid in enumerate(log['bot_uuids']):
-                results_by_bot[fooUuid][0].append(log['bot_rankings'][botIdx])
-                results_by_bot[fooUuid][1].append(log['bot_count'])
-        full_names = [clients[fooUuid]['metadata']['full_title'] for fooUuid in bot_uuids]
+        # Restart engines if the tourney did not finish cleanly so stale games do not leak into the next one
+        if tourney_aborted:
+            stopEnginePool(engine_processes, engine_stop_event)
+            task_queue, engine_processes, engine_stop_event = startEnginePool(engine_connect_address, server_config)
 
         # Score games
-        tourney_score = [0.0 for _ in bot_uuids]
-        if server_config['scoring_method'] == '531':
-            # 531 scoring is first gets 5 points, second 3, and third 1
-            for botIdx, fooUuid in enumerate(bot_uuid_str):
-                rankings = np.array(results_by_bot[fooUuid][0])
-                tourney_score[botIdx] += 5*len(np.where(rankings == 0)[0])
-                tourney_score[botIdx] += 3*len(np.where(rankings == 1)[0])
-                tourney_score[botIdx] += 1*len(np.where(rankings == 2)[0])
-        elif server_config['scoring_method'] == 'even':
-            for botIdx, fooUuid in enumerate(bot_uuid_str):
-                rankings = np.array(results_by_bot[fooUuid])
-                # Flip so first gets 1 point, last gets 0, and the spread is even between them
-                rankings[1] -= 1 # 
-                tourney_score[botIdx] = np.sum((rankings[1] - rankings[0]) / rankings[1])
-        else:
-            print(f"ERROR: Scoring method {server_config['scoring_method']} does not exist")
-        
-        # Add score mult
-        tourney_score = [score * server_config['score_mult'] for score in tourney_score]
+        bot_uuid_str = [foo.decode() for foo in tourney_client_uuids]
+        results_by_bot, tourney_score = game_engine.scoreTourney(game_results, bot_uuid_str, server_config)
 
         # Get score for each player
         player_name_match = np.array([clients[fooUuid]['metadata']['player'] for fooUuid in tourney_client_uuids])
@@ -614,28 +774,10 @@ def runServer(server_config):
                 print(f"{name} score {scores}")
 
         # Generate tourney logs
-        tourney_logs = {
-            "tourney_tag": server_config['tourney_tag'],
-            "tourney_game_count": game_count,
-            "scoring_method": server_config['scoring_method'],
-            "score_multiplier": server_config['score_mult'],
-
-            "results_by_bot": results_by_bot,
-            "bot_fullnames": full_names,
-            "bot_player": [clients[fooUuid]['metadata']['player'] for fooUuid in bot_uuids],
-            "bot_name": [clients[fooUuid]['metadata']['name'] for fooUuid in bot_uuids],
-            "bot_version": [clients[fooUuid]['metadata']['version'] for fooUuid in bot_uuids],
-            "bot_scores": tourney_score,
-            "bot_count": len(bot_uuids),
-
-            "start_time": tourney_start_time,
-            "end_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            "tourney_uuid": tourney_uuid,
-            "tourney_index": tourney_idx,
-            "bot_uuids": bot_uuid_str,
-            "game_uuids": [log['game_uuid'] for log in game_logs],
-            "game_logs": game_logs,
-        }           
+        tourney_logs = game_engine.buildTourneyLog(
+            server_config, game_count, bot_uuid_str, [clients[fooUuid]['metadata'] for fooUuid in bot_uuids],
+            results_by_bot, tourney_score, game_results, tourney_uuid, tourney_idx, tourney_seed, tourney_start_time
+        )
 
         # Send responses to logger
         broadcast_socket.send_multipart([
@@ -0,0 +1,144 @@
+# Headless tourney simulator
+# Runs bot files directly in a process pool with the same game rules as the server, no sockets involved
+# Writes client, tourney and game jsons in the same layout as the server so process_logs can ingest them
+
+from datetime import datetime
+import argparse
+import json
+import time
+import uuid
+import os
+import sys
+import importlib.util
+from pathlib import Path
+from multiprocessing import Pool
+
+import game_engine
+
+# Bots can import helper modules that ship with the client
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'client'))
+
+parser = argparse.ArgumentParser()
+parser.add_argument("bot_paths", nargs='+', help="Python files containing bot info, same as run_client.py")
+parser.add_argument("-c", "--config_path", default=str(Path(__file__).parent / 'server_config.json'), help="Server config to take game rules from")
+parser.add_argument("-t", "--tourney_count", default=1, type=int, help="How many tourneys to run (default is 1)")
+parser.add_argument("-w", "--workers", default=os.cpu_count(), type=int, help="How many processes to run games on (default is one per core)")
+parser.add_argument("-o", "--logs_path", default=None, help="Where to write logs (default is logs_path from the config)")
+parser.add_argument("--tag", default="simulation", help="Tourney tag to log so simulations don't mix with real play (default is simulation)")
+parser.add_argument("-s", "--seed", default=None, type=int, help="Base seed, tourney seeds are derived from it so the whole run can be repeated (default is random)")
+parser.add_argument("--chunk_size", default=50, type=int, help="Games per task handed to a worker (default is 50)")
+args = parser.parse_args()
+
+# Load the bot modules once per worker
+BOTS = {}
+
+def loadBots(bot_paths, bot_uuids):
+    for bot_path, bot_uuid in zip(bot_paths, bot_uuids):
+        # Import library specified as argument, the same way run_client.py does
+        spec = importlib.util.spec_from_file_location(Path(bot_path).stem, bot_path)
+        bot_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(bot_module)
+        BOTS[bot_uuid.encode('utf-8')] = bot_module
+
+def simulateGame(game_bot_uuids, game_seed, tourney_uuid, server_config):
+    game = game_engine.newGame(server_config['dice_count'], server_config['do_drop_wilds'], game_bot_uuids, tourney_uuid, game_seed)
+    while not game_engine.isGameOver(game):
+        bot_uuid, game_state = game_engine.moveRequest(game)
+
+        # Bots get their own copy of the state, same as if it came over the wire
+        response_ping = time.time()
+        try:
+            response = BOTS[bot_uuid].calculateMove(json.loads(json.dumps(game_state)))
+            response = json.loads(json.dumps(response))
+        except Exception:
+            response = None # Bots that crash lose the round for a bad response
+        response_ping = time.time() - response_ping
+
+        if response_ping*1000 > server_config['move_timeout_mS']:
+            game_engine.handleTimeout(game, response_ping)
+        else:
+            game_engine.handleResponse(game, response if isinstance(response, dict) else json.dumps(response), response_ping)
+
+        # Timeout if exceeded tourney timeout
+        if game_engine.isGameTimedOut(game, server_config['game_timeout_mS']):
+            print(f"CRITICAL: GAME EXCEEDED TIMEOUT. Game state:{game['game_state']}")
+            return None
+
+    return game_engine.buildGameLog(game)
+
+def simulateGames(task):
+    # Worker task, runs a chunk of one tourney's games and writes their logs
+    # Only what scoring needs goes back to the main process
+    tourney_idx, game_tables, tourney_uuid, server_config, log_path = task
+    game_results = []
+    for game_bot_uuids, game_seed in game_tables:
+        game_log = simulateGame(game_bot_uuids, game_seed, tourney_uuid, server_config)
+        if game_log is None:
+            continue
+        game_engine.writeGameLog(log_path, tourney_uuid, game_log['game_uuid'], json.dumps(game_log).encode('utf-8'))
+        game_results.append(game_engine.gameResult(game_log))
+    return tourney_idx, game_results
+
+def runSimulation():
+    server_config = json.load(open(args.config_path))
+    server_config['tourney_tag'] = args.tag
+    log_path = Path(args.logs_path or server_config['logs_path'])
+    os.makedirs(log_path / "json" / "clients", exist_ok=True)
+    os.makedirs(log_path / "json" / "tournies", exist_ok=True)
+
+    # Register every bot like run_client.py would
+    bot_uuids = [str(uuid.uuid4()) for _ in args.bot_paths]
+    loadBots(args.bot_paths, bot_uuids)
+    bot_metadata = []
+    for bot_uuid in bot_uuids:
+        metadata = dict(BOTS[bot_uuid.encode('utf-8')].BOT_REGISTRY_DATA)
+        metadata["session_uuid"] = bot_uuid
+        metadata["full_title"] = "_".join([metadata['name'], metadata['version'], metadata['player']])
+        bot_metadata.append(metadata)
+        game_engine.writeLogFile(log_path / "json" / "clients" / f"{bot_uuid}.json", json.dumps(metadata, indent='\t').encode('utf-8'))
+        print(f"Loaded {metadata['full_title']}")
+
+    # Plan every tourney up front and split them into chunks for the workers
+    bot_uuid_bytes = [foo.encode('utf-8') for foo in bot_uuids]
+    tourney_uuids = [str(uuid.uuid4()) for _ in range(args.tourney_count)]
+    tourney_seeds = [game_engine.tourneySeed(args.seed, tourney_idx) for tourney_idx in range(args.tourney_count)]
+    tourney_game_counts = []
+    tasks = []
+    for tourney_idx, tourney_uuid in enumerate(tourney_uuids):
+        game_tables = game_engine.planTourneyGames(bot_uuid_bytes, server_config, tourney_seeds[tourney_idx])
+        tourney_game_counts.append(len(game_tables))
+        for chunk_start in range(0, len(game_tables), args.chunk_size):
+            tasks.append([tourney_idx, game_tables[chunk_start:chunk_start+args.chunk_size], tourney_uuid, server_config, log_path])
+    print(f"Running {sum(tourney_game_counts)} games in {args.tourney_count} tourneys on {args.workers} workers")
+
+    # Chunks come back in order, so each tourney can be written out as soon as its last chunk lands
+    start_time = time.time()
+    current_idx = 0
+    game_results = []
+    tourney_start_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with Pool(args.workers, initializer=loadBots, initargs=[args.bot_paths, bot_uuids]) as pool:
+        for tourney_idx, chunk_results in pool.imap(simulateGames, tasks):
+            if tourney_idx != current_idx:
+                writeTourneyLog(server_config, log_path, tourney_game_counts[current_idx], bot_uuids, bot_metadata, game_results, tourney_uuids[current_idx], current_idx, tourney_seeds[current_idx], tourney_start_time)
+                current_idx = tourney_idx
+                game_results = []
+                tourney_start_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            game_results += chunk_results
+        writeTourneyLog(server_config, log_path, tourney_game_counts[current_idx], bot_uuids, bot_metadata, game_results, tourney_uuids[current_idx], current_idx, tourney_seeds[current_idx], tourney_start_time)
+
+    total_time = time.time() - start_time
+    print(f"Finished {sum(tourney_game_counts)} games in {total_time:.1f} seconds ({sum(tourney_game_counts)/total_time:.0f} games per second)")
+
+def writeTourneyLog(server_config, log_path, game_count, bot_uuids, bot_metadata, game_results, tourney_uuid, tourney_idx, tourney_seed, tourney_start_time):
+    results_by_bot, tourney_score = game_engine.scoreTourney(game_results, bot_uuids, server_config)
+    tourney_log = game_engine.buildTourneyLog(
+        server_config, game_count, bot_uuids, bot_metadata,
+        results_by_bot, tourney_score, game_results, tourney_uuid, tourney_idx, tourney_seed, tourney_start_time
+    )
+    game_engine.writeLogFile(log_path / "json" / "tournies" / f"{str(tourney_idx).rjust(8, '0')}_{tourney_uuid}.json", json.dumps(tourney_log, indent='\t').encode('utf-8'))
+
+    scores = ", ".join(f"{name} {score:.2f}" for name, score in zip(tourney_log['bot_fullnames'], tourney_score))
+    print(f"Tourney {tourney_idx}: {scores}")
+
+if __name__ == '__main__':
+    runSimulation()
@@ -0,0 +1,40 @@
+import numpy as np
+
+import dice_odds
+
+# Hardcoded bot metadata
+BOT_REGISTRY_DATA = {
+    "player": "OddsPlayer",
+    "name": "BinomialOdds",
+    "version": "1.0",
+    "stateless": True,
+    "software_engineer": True,
+    "machine_learning": False,
+    "internet": False,
+}
+
+# Call when the current bid is less likely than this
+CALL_BELOW = 0.5
+
+# Reference baseline, only looks at its own dice and assumes everyone else's are random
+def calculateMove(game_state):
+    ladder = dice_odds.bid_ladder(game_state)
+
+    # Call if the current bid is probably a bluff, there is nothing to call on the first bid
+    bid_count, bid_face = game_state['bid']
+    if bid_count > 0 and ladder[bid_count, bid_face-1] < CALL_BELOW:
+        return {
+            "response_type": "call",
+        }
+
+    # Otherwise make the likeliest legal raise, the lowest one if there are ties
+    ladder[~dice_odds.legal_bids(game_state)] = -1
+    count, face_idx = np.unravel_index(np.argmax(ladder), ladder.shape)
+    if ladder[count, face_idx] < 0:
+        return {
+            "response_type": "call",
+        }
+    return {
+        "response_type": "bid",
+        "bid": [int(count), int(face_idx)+1]
+    }
@@ -17,6 +17,7 @@ programs = [
     "python3 client/run_client.py localhost testBots/call.py",
     "python3 client/run_client.py localhost testBots/raise_5_sixes.py",
     "python3 client/run_client.py localhost testBots/bidOnes.py",
+    "python3 client/run_client.py localhost testBots/oddsBot.py",
 ]
 
 # Dictionary to track processes {program: process_object or None}
@@ -0,0 +1,45 @@
+# Shared setup for the tests
+# Modules are imported the way the scripts import each other, straight off the server, client and data directories
+
+from pathlib import Path
+import json
+import sys
+import numpy as np
+import pytest
+
+REPO_PATH = Path(__file__).resolve().parent.parent
+for foo in ['server', 'client', 'data']:
+    sys.path.append(str(REPO_PATH / foo))
+
+import game_engine
+
+def simple_move(game_state, rng):
+    # Raises on its best face until the bid gets past a third of the dice, then calls
+    # Now and then it bids ones so wild ones get dropped, or makes a bad bid on purpose
+    bid_count, bid_face = game_state['bid']
+    if bid_count*3 > sum(game_state['dice_counts']):
+        return {"response_type": "call"}
+    if bid_count > 0 and rng.random() < 0.05:
+        return {"response_type": "bid", "bid": [bid_count-1, bid_face]}
+    if rng.random() < 0.2:
+        return {"response_type": "bid", "bid": [bid_count+1, 1]}
+    return {"response_type": "bid", "bid": [bid_count+1, int(np.argmax(game_state['dice'][1:]))+2]}
+
+def play_game(bot_uuids, game_seed, dice_count=5, do_drop_wilds=True, on_move=None):
+    # Plays one game through the real engine and returns its log the way it's written to disk
+    # on_move gets a copy of every game state a bot is sent, as it would come over the wire
+    rng = np.random.default_rng(game_seed)
+    game = game_engine.newGame(dice_count, do_drop_wilds, [foo.encode('utf-8') for foo in bot_uuids], 'test-tourney', game_seed)
+    while not game_engine.isGameOver(game):
+        _, game_state = game_engine.moveRequest(game)
+        game_state = json.loads(json.dumps(game_state))
+        if on_move is not None:
+            on_move(game_state)
+        game_engine.handleResponse(game, simple_move(game_state, rng), 0.001)
+    return json.loads(json.dumps(game_engine.buildGameLog(game)))
+
+@pytest.fixture(scope='session')
+def game_logs():
+    # A handful of games of different sizes
+    bot_uuids = [f"bot-{foo}" for foo in range(5)]
+    return [play_game(bot_uuids[:2 + game_idx % 4], game_idx) for game_idx in range(8)]
@@ -0,0 +1,60 @@
+from math import comb
+import numpy as np
+import pytest
+
+import dice_odds
+
+def exact_tail(unseen_count, needed, p):
+    return sum(comb(unseen_count, k) * p**k * (1-p)**(unseen_count-k) for k in range(max(needed, 0), unseen_count+1))
+
+def random_state(rng):
+    # A game state as a bot would get it, with our own dice as face counts
+    player_count = int(rng.integers(2, 7))
+    dice_counts = rng.integers(0, 6, player_count)
+    dice_counts[0] = max(dice_counts[0], 1)
+    dice = np.bincount(rng.integers(0, 6, dice_counts[0]), minlength=6)
+    bid_count = int(rng.integers(0, dice_counts.sum()+1))
+    return {
+        'bid': [bid_count, int(rng.integers(1, 7)) if bid_count > 0 else 6],
+        'dice': dice.tolist(),
+        'dice_counts': dice_counts.tolist(),
+        'wild_ones': bool(rng.random() < 0.5),
+    }
+
+@pytest.mark.parametrize('wild', [False, True])
+def test_tail_probability_is_binomial(wild):
+    p = dice_odds.match_chance(wild)
+    for unseen_count in range(dice_odds.MAX_DICE+1):
+        for needed in range(-1, unseen_count+3):
+            assert dice_odds.tail_probability(unseen_count, needed, wild) == pytest.approx(exact_tail(unseen_count, needed, p), abs=1e-12)
+
+def test_tables_grow_for_bigger_games():
+    unseen_count = dice_odds.MAX_DICE + 10
+    assert dice_odds.tail_probability(unseen_count, 15, True) == pytest.approx(exact_tail(unseen_count, 15, 2/6), abs=1e-12)
+    assert dice_odds.MAX_DICE >= unseen_count
+
+def test_own_matches_count_wild_ones():
+    game_state = {'dice': [2, 0, 1, 0, 0, 1], 'wild_ones': True}
+    assert dice_odds.own_matches(game_state).tolist() == [2, 2, 3, 2, 2, 3]
+    game_state['wild_ones'] = False
+    assert dice_odds.own_matches(game_state).tolist() == [2, 0, 1, 0, 0, 1]
+
+def test_bid_ladder_matches_bid_probability():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        game_state = random_state(rng)
+        ladder = dice_odds.bid_ladder(game_state)
+        assert ladder.shape == (sum(game_state['dice_counts'])+1, 6)
+        for count in range(ladder.shape[0]):
+            for face in range(1, 7):
+                assert ladder[count, face-1] == pytest.approx(dice_odds.bid_probability(game_state, [count, face]), abs=1e-12)
+
+def test_legal_bids():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        game_state = random_state(rng)
+        legal = dice_odds.legal_bids(game_state)
+        bid_count, bid_face = game_state['bid']
+        for count in range(legal.shape[0]):
+            for face in range(1, 7):
+                assert legal[count, face-1] == (count > bid_count or (count == bid_count and face > bid_face))
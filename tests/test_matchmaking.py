@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from matchmaking import planTourney
+
+# bot count, player count, games per bot, tourney seed
+TOURNEYS = [
+    (5, [2, 6], 20, 1),
+    (7, [2, 6], 40, 2),
+    (12, [3, 6], 30, 3),
+    (4, [2, 4], 17, 4),
+    (20, [2, 6], 25, 5),
+    (3, [2, 8], 10, 6),
+]
+
+def plan(bot_count, player_count, games_per_bot, tourney_seed):
+    bot_uuids = [f"bot-{foo}" for foo in range(bot_count)]
+    tables = planTourney(bot_uuids, player_count, games_per_bot, tourney_seed)
+    return bot_uuids, tables, [[bot_uuids.index(bot) for bot in table] for table in tables]
+
+@pytest.mark.parametrize('bot_count, player_count, games_per_bot, tourney_seed', TOURNEYS)
+def test_tables_are_legal(bot_count, player_count, games_per_bot, tourney_seed):
+    _, tables, _ = plan(bot_count, player_count, games_per_bot, tourney_seed)
+    for table in tables:
+        assert player_count[0] <= len(table) <= min(bot_count, player_count[1])
+        assert len(set(table)) == len(table)
+
+@pytest.mark.parametrize('bot_count, player_count, games_per_bot, tourney_seed', TOURNEYS)
+def test_games_are_spread_evenly(bot_count, player_count, games_per_bot, tourney_seed):
+    # Every bot plays the same number of games, and never gets more than one game ahead of any other on the way there
+    _, _, table_ids = plan(bot_count, player_count, games_per_bot, tourney_seed)
+    games_played = np.zeros(bot_count, dtype=np.int64)
+    for table in table_ids:
+        games_played[table] += 1
+        assert games_played.max() - games_played.min() <= 1
+    assert (games_played == games_per_bot).all()
+
+@pytest.mark.parametrize('bot_count, player_count, games_per_bot, tourney_seed', TOURNEYS)
+def test_opponents_and_seats_are_balanced(bot_count, player_count, games_per_bot, tourney_seed):
+    _, _, table_ids = plan(bot_count, player_count, games_per_bot, tourney_seed)
+    pair_counts = np.zeros([bot_count, bot_count], dtype=np.int64)
+    seat_counts = {}
+    for table in table_ids:
+        pair_counts[np.ix_(table, table)] += 1
+        seats = seat_counts.setdefault(len(table), np.zeros([bot_count, len(table)], dtype=np.int64))
+        seats[table, np.arange(len(table))] += 1
+    opponent_counts = pair_counts[~np.eye(bot_count, dtype=bool)]
+    assert opponent_counts.max() - opponent_counts.min() <= 5
+    # Each bot sits in every seat of a table size about as often as the others
+    for seats in seat_counts.values():
+        assert (seats.max(axis=1) - seats.min(axis=1)).max() <= 3
+
+def test_same_seed_same_plan():
+    assert plan(7, [2, 6], 10, 11)[1] == plan(7, [2, 6], 10, 11)[1]
+    assert plan(7, [2, 6], 10, 11)[1] != plan(7, [2, 6], 10, 12)[1]
+
+def test_minimum_tables_that_dont_fit():
+    # Seats can't be shrunk below the minimum table size, so a few bots play one extra game
+    _, _, table_ids = plan(4, [3, 3], 1, 0)
+    games_played = np.bincount(np.concatenate(table_ids), minlength=4)
+    assert len(table_ids) == 2
+    assert set(games_played.tolist()) == {1, 2}
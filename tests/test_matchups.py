@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+import matchups
+
+def random_games(game_count, titles, seed):
+    # game_results style rows, games of 2 to 5 seats drawn from titles, the same title can sit twice
+    rng = np.random.default_rng(seed)
+    game_uuids, game_titles, rankings = [], [], []
+    for game_idx in range(game_count):
+        size = int(rng.integers(2, 6))
+        game_uuids += [f"game-{seed}-{game_idx}"] * size
+        game_titles += rng.choice(titles, size).tolist()
+        rankings += rng.permutation(size).tolist()
+    return np.array(game_uuids), np.array(game_titles, dtype=object), np.array(rankings)
+
+def expected_counts(game_uuids, titles, rankings, bot_titles):
+    # Pair by pair count of the same thing add_games counts in one pass
+    bot_count = len(bot_titles)
+    games = np.zeros([6, bot_count, bot_count], dtype=np.int64)
+    wins = np.zeros_like(games)
+    rank_sums = np.zeros([6, bot_count], dtype=np.int64)
+    for game_uuid in pd.unique(game_uuids):
+        seats = np.where(game_uuids == game_uuid)[0]
+        size = len(seats)
+        for seat in seats:
+            bot = bot_titles.index(titles[seat])
+            rank_sums[size, bot] += rankings[seat]
+            for other in seats:
+                opponent = bot_titles.index(titles[other])
+                if bot != opponent:
+                    games[size, bot, opponent] += 1
+                    wins[size, bot, opponent] += rankings[seat] < rankings[other]
+    return games, wins, rank_sums
+
+def empty_batch():
+    return np.array([], dtype=str), np.array([], dtype=object), np.array([], dtype=np.int64)
+
+def test_add_games_counts_every_pair():
+    titles = [f"bot_{foo}" for foo in range(6)]
+    game_uuids, game_titles, rankings = random_games(200, titles, 0)
+    counts = matchups.new_matchups()
+    matchups.add_games(counts, game_uuids, game_titles, rankings)
+
+    games, wins, rank_sums = expected_counts(game_uuids, game_titles, rankings, counts['bot_titles'])
+    assert (counts['games'] == games).all()
+    assert (counts['wins'] == wins).all()
+    assert (counts['rank_sums'] == rank_sums).all()
+    assert counts['rank_counts'].sum() == len(game_uuids)
+
+def test_add_games_in_batches():
+    # Counting in batches with bots showing up part way through matches counting everything at once
+    titles = [f"bot_{foo}" for foo in range(6)]
+    batches = [random_games(50, titles[:3], 1), random_games(50, titles, 2), empty_batch()]
+    batched = matchups.new_matchups()
+    for batch in batches:
+        matchups.add_games(batched, *batch)
+    at_once = matchups.new_matchups()
+    matchups.add_games(at_once, *[np.concatenate(foo) for foo in zip(*batches)])
+
+    assert batched['bot_titles'] == at_once['bot_titles']
+    for key in ['games', 'wins', 'rank_sums', 'rank_counts']:
+        assert (batched[key] == at_once[key]).all()
+
+def test_win_ratio():
+    # best always beats middle, middle always beats worst
+    counts = matchups.new_matchups()
+    matchups.add_games(
+        counts,
+        np.array(['a', 'a', 'a', 'b', 'b', 'c', 'c']),
+        np.array(['middle', 'worst', 'best', 'middle', 'worst', 'best', 'middle'], dtype=object),
+        np.array([1, 2, 0, 0, 1, 0, 1]),
+    )
+    ratio, bot_order = matchups.win_ratio(counts)
+    assert bot_order.tolist() == ['best', 'middle', 'worst']
+    assert np.isnan(np.diag(ratio)).all()
+    assert ratio[0, 1] == 100 and ratio[1, 0] == 0 and ratio[1, 2] == 100
+    # Only the three seat game
+    ratio, bot_order = matchups.win_ratio(counts, 3)
+    assert ratio[0, 2] == 100 and ratio[2, 0] == 0
+
+def test_update_matchups(tmp_path):
+    # New partitions are counted once and cached, partitions with bots the client table doesn't know yet wait
+    client = pd.DataFrame({'bot_uuid': ['uuid-a', 'uuid-b'], 'full_title': ['bot_a', 'bot_b']})
+    (tmp_path / 'game_results').mkdir()
+    pd.DataFrame({'game_uuid': ['g1', 'g1'], 'bot_uuid': ['uuid-a', 'uuid-b'], 'bot_ranking': [0, 1]}).to_parquet(tmp_path / 'game_results' / 'first.parquet')
+    pd.DataFrame({'game_uuid': ['g2', 'g2'], 'bot_uuid': ['uuid-a', 'uuid-c'], 'bot_ranking': [1, 0]}).to_parquet(tmp_path / 'game_results' / 'second.parquet')
+
+    counts = matchups.update_matchups(tmp_path, client)
+    assert counts['partitions'] == ['first']
+    assert counts['games'].sum() == 2
+
+    client.loc[2] = ['uuid-c', 'bot_c']
+    counts = matchups.update_matchups(tmp_path, client)
+    assert counts['partitions'] == ['first', 'second']
+    assert counts['games'].sum() == 4
+
+    cached = matchups.load_matchups(tmp_path / matchups.CACHE_NAME)
+    assert cached['bot_titles'] == counts['bot_titles'] and cached['partitions'] == counts['partitions']
+    assert (cached['wins'] == counts['wins']).all()
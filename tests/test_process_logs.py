@@ -0,0 +1,148 @@
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import game_engine
+from process_logs import flatten_game_logs, group_starts, load_tourney_json, log_ingestor_threads, save_tourney_parquets
+
+def write_tourney(log_path, name, game_logs, tourney_uuid):
+    # Lays out a tourney json and its game logs the way the server writes them, returns the tourney json path
+    bot_uuids = sorted(set(uuid for game_log in game_logs for uuid in game_log['bot_uuids']))
+    tourney_log = {
+        'tourney_tag': 'test', 'tourney_game_count': len(game_logs), 'scoring_method': 'test', 'score_multiplier': 1,
+        'start_time': '2026-01-01 00:00:00', 'end_time': '2026-01-01 00:01:00',
+        'tourney_uuid': tourney_uuid, 'tourney_index': 0, 'bot_count': len(bot_uuids),
+        'results_by_bot': {uuid: [[1.0], [0]] for uuid in bot_uuids},
+        'bot_fullnames': bot_uuids, 'bot_player': bot_uuids, 'bot_name': bot_uuids, 'bot_version': ['1'] * len(bot_uuids),
+        'bot_scores': [1.0] * len(bot_uuids),
+        'game_uuids': [game_log['game_uuid'] for game_log in game_logs],
+    }
+    for game_log in game_logs:
+        game_engine.writeGameLog(log_path, tourney_uuid, game_log['game_uuid'], json.dumps(game_log).encode('utf-8'))
+    tourney_path = log_path / 'json' / 'tournies' / f"{name}.json"
+    os.makedirs(tourney_path.parent, exist_ok=True)
+    game_engine.writeLogFile(tourney_path, json.dumps(tourney_log).encode('utf-8'))
+    return tourney_path
+
+def expected_moves(game_log):
+    # Move rows for one game the way process_logs built them one row at a time before flatten_game_logs
+    # Every uncalled bid, then the call or error, then the bid it judged
+    rows = []
+    for round_index, round_log in enumerate(game_log['game_history']):
+        bids = round_log['bid_history']
+        # Ones stop being wild once they're bid before the first bidder's turn comes back around
+        wild_ones = True
+        is_first_go_around = True
+        first_bot_index = bids[0][2] if len(bids) > 0 else 0
+        for bid_index, (count, face, bot) in enumerate(bids[:-1]):
+            if bid_index > 0 and is_first_go_around:
+                if face == 1:
+                    wild_ones = False
+                if bot == first_bot_index:
+                    is_first_go_around = False
+            rows.append([round_index, bid_index, game_log['bot_uuids'][bot], 'uncalled_bid', count, face, wild_ones])
+        rows.append([round_index, len(bids), game_log['bot_uuids'][round_log['calling_player']], round_log['result'], np.nan, np.nan, wild_ones])
+        if len(bids) > 0:
+            count, face, bot = bids[-1]
+            result = {'good_call': 'bad_bid', 'bad_call': 'good_bid'}.get(round_log['result'], 'uncalled_bid')
+            rows.append([round_index, len(bids)-1, game_log['bot_uuids'][bot], result, count, face, wild_ones])
+    return pd.DataFrame(rows, columns=['round_index', 'bid_index', 'bot_uuid', 'result', 'bid_count', 'bid_face', 'wild_ones']).assign(game_uuid=game_log['game_uuid'])
+
+def test_group_starts():
+    assert group_starts([3, 0, 2, 1]).tolist() == [0, 3, 3, 5]
+    assert group_starts([]).tolist() == []
+
+def test_game_results(game_logs):
+    game_results, _, _ = flatten_game_logs(game_logs)
+    assert len(game_results) == sum(len(foo['bot_uuids']) for foo in game_logs)
+    for game_log in game_logs:
+        rows = game_results[game_results['game_uuid'] == game_log['game_uuid']]
+        assert rows['bot_uuid'].tolist() == game_log['bot_uuids']
+        assert rows['turn_placement'].tolist() == list(range(len(game_log['bot_uuids'])))
+        assert rows['bot_ranking'].tolist() == game_log['bot_rankings']
+        assert rows['ping_average_mS'].tolist() == game_log['ping_averages_mS']
+
+def test_hands(game_logs):
+    _, _, game_hands = flatten_game_logs(game_logs)
+    faces = [str(foo) for foo in range(1, 7)]
+    expected = [
+        [game_log['bot_uuids'][seat], game_log['game_uuid'], round_index] + face_counts
+        for game_log in game_logs
+        for round_index, round_log in enumerate(game_log['game_history'])
+        for seat, face_counts in enumerate(round_log['face_counts'])
+    ]
+    assert game_hands[['bot_uuid', 'game_uuid', 'round_index'] + faces].values.tolist() == expected
+
+def test_move_results(game_logs):
+    _, move_results, _ = flatten_game_logs(game_logs)
+    # Every kind of round ending should be in the logs for this to mean much
+    assert {'good_call', 'bad_call', 'error_lower_count', 'error_bad_response'} <= set(move_results['result'])
+    expected = pd.concat([expected_moves(foo) for foo in game_logs], ignore_index=True)[move_results.columns]
+    pd.testing.assert_frame_equal(move_results.reset_index(drop=True), expected, check_dtype=False)
+    # Ones have to actually get bid and dropped for the wild_ones column to be checked
+    dropped_rounds = expected.loc[~expected['wild_ones'], ['game_uuid', 'round_index']].drop_duplicates()
+    assert (move_results['bid_face'] == 1).any()
+    assert len(dropped_rounds) > 0
+    assert len(move_results.loc[~move_results['wild_ones'], ['game_uuid', 'round_index']].drop_duplicates()) == len(dropped_rounds)
+
+def test_no_games(game_logs):
+    # Tourneys where no game finished still get every column, with the same types as a normal tourney
+    for empty, full in zip(flatten_game_logs([]), flatten_game_logs(game_logs)):
+        assert len(empty) == 0
+        assert empty.dtypes.to_dict() == full.dtypes.to_dict()
+
+def test_one_partition_per_tourney(game_logs, tmp_path):
+    # Each tourney writes its own files, and ingesting a tourney again replaces its files instead of adding to them
+    first = write_tourney(tmp_path, 'first', game_logs[:3], 'tourney-1')
+    second = write_tourney(tmp_path, 'second', game_logs[3:], 'tourney-2')
+    for tourney_path in [first, second, first]:
+        save_tourney_parquets(load_tourney_json(tourney_path, None), tmp_path)
+
+    for table in ['tourney', 'game', 'tourney_results', 'game_results', 'move_results', 'hands']:
+        assert sorted(os.listdir(tmp_path / table)) == ['first.parquet', 'second.parquet']
+    game = pd.read_parquet(tmp_path / 'game')
+    assert sorted(game['game_uuid']) == sorted(foo['game_uuid'] for foo in game_logs)
+    assert len(pd.read_parquet(tmp_path / 'game_results')) == sum(len(foo['bot_uuids']) for foo in game_logs)
+
+def test_missing_game_logs_are_skipped(game_logs, tmp_path):
+    # The rest of the tourney is still ingested, with each game keeping its place in the tourney
+    tourney_path = write_tourney(tmp_path, 'tourney', game_logs, 'tourney-1')
+    os.remove(game_engine.gameLogPath(tmp_path, 'tourney-1', game_logs[1]['game_uuid']))
+    with open(game_engine.gameLogPath(tmp_path, 'tourney-1', game_logs[4]['game_uuid']), 'w') as file:
+        file.write('{"game_history": [')
+
+    (_, tables), = load_tourney_json(tourney_path, None)
+    kept = [idx for idx in range(len(game_logs)) if idx not in [1, 4]]
+    assert tables['game']['game_uuid'].tolist() == [game_logs[idx]['game_uuid'] for idx in kept]
+    assert tables['game']['game_index'].tolist() == kept
+    assert set(tables['game_results']['game_uuid']) == set(tables['game']['game_uuid'])
+
+def wait_for(condition, timeout_S=10):
+    deadline = time.time() + timeout_S
+    while not condition():
+        assert time.time() < deadline, "Timed out waiting for the ingestor"
+        time.sleep(0.05)
+
+def test_ingestor_threads(game_logs, tmp_path):
+    # Files already there are caught up on at startup, new ones come in on the queues, broken ones are skipped and left out of the index
+    write_tourney(tmp_path, 'before', game_logs[:2], 'tourney-1')
+    file_queues = log_ingestor_threads(tmp_path, silence=True)
+    wait_for(lambda: os.path.exists(tmp_path / 'tourney' / 'before.parquet'))
+
+    broken_path = tmp_path / 'json' / 'tournies' / 'broken.json'
+    game_engine.writeLogFile(broken_path, b'{"tourney_uuid": ')
+    file_queues['tournies'].put(str(broken_path))
+    file_queues['tournies'].put(str(write_tourney(tmp_path, 'after', game_logs[2:4], 'tourney-2')))
+    client_path = tmp_path / 'json' / 'clients' / 'client.json'
+    os.makedirs(client_path.parent, exist_ok=True)
+    game_engine.writeLogFile(client_path, json.dumps({'session_uuid': 'bot-0', 'name': 'test'}).encode('utf-8'))
+    file_queues['clients'].put(str(client_path))
+
+    wait_for(lambda: os.path.exists(tmp_path / 'tourney' / 'after.parquet'))
+    wait_for(lambda: os.path.exists(tmp_path / 'client.parquet'))
+    assert pd.read_parquet(tmp_path / 'client.parquet')['bot_uuid'].tolist() == ['bot-0']
+    assert sorted(os.listdir(tmp_path / 'game')) == ['after.parquet', 'before.parquet']
+    ingested = open(tmp_path / '.ingested_tournies').read().split()
+    assert sorted(os.path.basename(foo) for foo in ingested) == ['after.json', 'before.json']
@@ -0,0 +1,109 @@
+import copy
+import json
+import numpy as np
+
+import protocol
+from conftest import play_game
+
+def test_delta_state_round_trip():
+    # Every game state a delta client rebuilds matches the full one, for every bot at every move
+    for game_seed in range(6):
+        bot_count = 2 + game_seed % 4
+        game_caches = [protocol.new_game_cache() for _ in range(bot_count)]
+        delta_sent = [[0, 0] for _ in range(bot_count)]
+
+        def check(game_state):
+            bot_index = game_state['bot_index']
+            last_sent = delta_sent[bot_index]
+            delta_sent[bot_index] = [game_state['round_count'], len(game_state['bid_history'])]
+            delta_state = protocol.make_delta_state(copy.deepcopy(game_state), last_sent)
+            assert 'round_history' not in delta_state and 'bid_history' not in delta_state
+            rebuilt = protocol.apply_delta_state(game_caches[bot_index], json.loads(json.dumps(delta_state)))
+            assert rebuilt == game_state
+
+        play_game([f"bot-{foo}" for foo in range(bot_count)], game_seed, on_move=check)
+
+def test_delta_state_after_timeouts():
+    # Same bookkeeping as the engine, where some moves time out either while the router holds them, so the bot never sees them,
+    # or after the bot got them, and either way the engine goes back to the base before that move
+    rng = np.random.default_rng(0)
+    for game_seed in range(6):
+        bot_count = 2 + game_seed % 4
+        game_caches = [protocol.new_game_cache() for _ in range(bot_count)]
+        delta_sent = [[0, 0] for _ in range(bot_count)]
+
+        def check(game_state):
+            bot_index = game_state['bot_index']
+            delta_base = delta_sent[bot_index]
+            delta_sent[bot_index] = [game_state['round_count'], len(game_state['bid_history'])]
+            delta_state = json.loads(json.dumps(protocol.make_delta_state(copy.deepcopy(game_state), delta_base)))
+            fate = rng.choice(['answered', 'held', 'late'])
+            if fate != 'held':
+                assert protocol.apply_delta_state(game_caches[bot_index], delta_state) == game_state
+            if fate != 'answered':
+                delta_sent[bot_index] = delta_base
+
+        play_game([f"bot-{foo}" for foo in range(bot_count)], game_seed, on_move=check)
+
+def test_delta_state_only_sends_whats_new():
+    game_state = {
+        'game_uuid': 'game', 'round_count': 2, 'bid': [3, 4],
+        'round_history': [{'result': 'good_call'}, {'result': 'bad_call'}],
+        'bid_history': [[2, 4, 0], [3, 4, 1]],
+    }
+    # Same round, one bid already sent
+    delta_state = protocol.make_delta_state(game_state, [2, 1])
+    assert delta_state['new_rounds'] == [] and delta_state['new_bids'] == [[3, 4, 1]]
+    # A round finished since, so every bid in the current round is new
+    delta_state = protocol.make_delta_state(game_state, [1, 5])
+    assert delta_state['new_rounds'] == [{'result': 'bad_call'}] and delta_state['new_bids'] == game_state['bid_history']
+    assert delta_state['delta_base'] == [1, 0]
+
+def test_game_cache_is_bounded():
+    game_cache = protocol.new_game_cache()
+    for game_idx in range(protocol.MAX_CACHED_GAMES + 10):
+        protocol.apply_delta_state(game_cache, {'game_uuid': game_idx, 'delta_base': [0, 0], 'new_rounds': [], 'new_bids': []})
+    assert len(game_cache) == protocol.MAX_CACHED_GAMES
+    assert 0 not in game_cache and protocol.MAX_CACHED_GAMES + 9 in game_cache
+    protocol.forget_game(game_cache, protocol.MAX_CACHED_GAMES + 9)
+    assert protocol.MAX_CACHED_GAMES + 9 not in game_cache
+
+def wire_encodings():
+    # msgpack only when it's installed, the same way clients pick
+    return ['json', 'binary'] + (['msgpack'] if protocol.msgpack is not None else [])
+
+def test_game_state_encodings_round_trip():
+    game_states = []
+    for game_seed in range(4):
+        play_game([f"bot-{foo}" for foo in range(2 + game_seed)], game_seed, on_move=game_states.append)
+    for encoding in wire_encodings():
+        for game_state in game_states:
+            assert protocol.decode_game_state(protocol.encode_game_state(game_state, encoding)) == game_state
+        # Delta states go through the same encoding
+        delta_state = protocol.make_delta_state(game_states[-1], [0, 0])
+        assert protocol.decode_game_state(protocol.encode_game_state(delta_state, encoding)) == delta_state
+
+def test_game_state_falls_back_to_json():
+    # A bid too big for the fixed header still gets through
+    game_state = {
+        'bid': [70000, 3], 'dice': [1, 0, 2, 0, 0, 2], 'dice_counts': [5, 5], 'bot_index': 1, 'player_count': 2,
+        'round_count': 0, 'wild_ones': True, 'first_round': True, 'bid_history': [], 'round_history': [], 'game_uuid': 'game',
+    }
+    message = protocol.encode_game_state(game_state, 'binary')
+    assert message[:1] == b'{'
+    assert protocol.decode_game_state(message) == game_state
+
+def test_move_encodings_round_trip():
+    for encoding in wire_encodings():
+        for response in [{'response_type': 'call'}, {'response_type': 'bid', 'bid': [12, 6]}]:
+            decoded = protocol.decode_move(protocol.encode_move(response, encoding))
+            # Json moves are passed through for the engine to parse
+            if encoding == 'json':
+                decoded = json.loads(decoded)
+            assert decoded == response
+
+def test_odd_moves_are_sent_as_json():
+    # The engine judges anything that doesn't fit the binary layout, so it has to arrive as the bot sent it
+    for response in [{'response_type': 'bid', 'bid': [-1, 3]}, {'response_type': 'bid', 'bid': [2.5, 3]}, {'response_type': 'raise'}, 'call', None]:
+        message = protocol.encode_move(response, 'binary')
+        assert json.loads(protocol.decode_move(message)) == response